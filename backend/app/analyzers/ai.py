@@ -3,11 +3,18 @@ AI-powered code review using free APIs.
 Supports Groq, Ollama, and Hugging Face.
 """
 import os
+import json
+import time
 import logging
-from typing import Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Default per-request timeout (seconds) for provider calls
+PROVIDER_TIMEOUT = 120
+
 # Try to import optional dependencies
 try:
     import requests
@@ -25,9 +32,65 @@ except ImportError:
     genai = None
 
 
-def generate_ai_review_groq(code: str, language: Optional[str] = None) -> str:
+class DeadlineExceeded(Exception):
+    """The review's deadline passed before or during a provider call."""
+
+
+# Absolute time.time() deadline for provider calls made in the current context
+_deadline: ContextVar[Optional[float]] = ContextVar("review_deadline", default=None)
+
+
+@contextmanager
+def review_deadline(deadline: Optional[float]) -> Iterator[None]:
+    """Bound every provider call made inside the block by `deadline` (epoch seconds)."""
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def deadline_passed() -> bool:
+    deadline = _deadline.get()
+    return deadline is not None and time.time() >= deadline
+
+
+def _request_timeout() -> float:
+    """Per-request timeout: the time left until the deadline, capped at PROVIDER_TIMEOUT."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return PROVIDER_TIMEOUT
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise DeadlineExceeded("Review deadline passed before the provider call")
+    return min(PROVIDER_TIMEOUT, remaining)
+
+
+REVIEW_FOCUS = """Provide a code review covering:
+1. Code quality and best practices
+2. Potential bugs or issues
+3. Security concerns
+4. Performance improvements
+5. Code style and readability"""
+
+
+def build_review_prompt(code: str, language: Optional[str] = None) -> str:
+    """Prompt for reviewing a single piece of code."""
+    language_str = f" ({language})" if language else ""
+    return f"""Review the following{language_str} code and provide constructive feedback:
+
+```{language or 'code'}
+{code}
+```
+
+{REVIEW_FOCUS}
+
+Format as a clear, structured review."""
+
+
+def complete_groq(prompt: str, max_tokens: int = 2000) -> str:
     """
-    Generate code review using Groq API (free tier: 14,400 requests/day).
+    Run a prompt through Groq API (free tier: 14,400 requests/day).
     Get API key: https://console.groq.com/
     """
     if not Groq:
@@ -39,22 +102,6 @@ def generate_ai_review_groq(code: str, language: Optional[str] = None) -> str:
     
     client = Groq(api_key=api_key)
     
-    language_str = f" ({language})" if language else ""
-    prompt = f"""Review the following{language_str} code and provide constructive feedback:
-
-```{language or 'code'}
-{code}
-```
-
-Provide a code review covering:
-1. Code quality and best practices
-2. Potential bugs or issues
-3. Security concerns
-4. Performance improvements
-5. Code style and readability
-
-Format as a clear, structured review."""
-
     try:
         response = client.chat.completions.create(
             model="llama-3.1-70b-versatile",  # or "mixtral-8x7b-32768" or "codellama-70b-instruct"
@@ -63,7 +110,8 @@ Format as a clear, structured review."""
                 {"role": "user", "content": prompt}
             ],
             temperature=0.3,
-            max_tokens=2000,
+            max_tokens=max_tokens,
+            timeout=_request_timeout(),
         )
         return response.choices[0].message.content
     except Exception as e:
@@ -71,9 +119,9 @@ Format as a clear, structured review."""
         raise
 
 
-def generate_ai_review_ollama(code: str, language: Optional[str] = None) -> str:
+def complete_ollama(prompt: str, max_tokens: int = 2000) -> str:
     """
-    Generate code review using Ollama (completely free, runs locally).
+    Run a prompt through Ollama (completely free, runs locally).
     Install: https://ollama.ai/
     Run: ollama pull codellama
     """
@@ -83,22 +131,6 @@ def generate_ai_review_ollama(code: str, language: Optional[str] = None) -> str:
     ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
     model = os.getenv("OLLAMA_MODEL", "codellama")  # or "deepseek-coder", "mistral"
     
-    language_str = f" ({language})" if language else ""
-    prompt = f"""Review the following{language_str} code and provide constructive feedback:
-
-```{language or 'code'}
-{code}
-```
-
-Provide a code review covering:
-1. Code quality and best practices
-2. Potential bugs or issues
-3. Security concerns
-4. Performance improvements
-5. Code style and readability
-
-Format as a clear, structured review."""
-
     try:
         response = requests.post(
             f"{ollama_url}/api/generate",
@@ -106,8 +138,9 @@ Format as a clear, structured review."""
                 "model": model,
                 "prompt": prompt,
                 "stream": False,
+                "options": {"num_predict": max_tokens},
             },
-            timeout=120,
+            timeout=_request_timeout(),
         )
         response.raise_for_status()
         return response.json()["response"]
@@ -116,9 +149,9 @@ Format as a clear, structured review."""
         raise
 
 
-def generate_ai_review_gemini(code: str, language: Optional[str] = None) -> str:
+def complete_gemini(prompt: str, max_tokens: int = 2000) -> str:
     """
-    Generate code review using Google Gemini (free tier).
+    Run a prompt through Google Gemini (free tier).
     Get API key: https://aistudio.google.com/app/apikey
     """
     if not genai:
@@ -131,22 +164,6 @@ def generate_ai_review_gemini(code: str, language: Optional[str] = None) -> str:
     # Configure the API
     genai.configure(api_key=api_key)
     
-    language_str = f" ({language})" if language else ""
-    prompt = f"""Review the following{language_str} code and provide constructive feedback:
-
-```{language or 'code'}
-{code}
-```
-
-Provide a code review covering:
-1. Code quality and best practices
-2. Potential bugs or issues
-3. Security concerns
-4. Performance improvements
-5. Code style and readability
-
-Format as a clear, structured review."""
-
     try:
         # Use gemini-2.5-flash (fastest, free) or gemini-2.5-pro (more capable)
         # Available models: gemini-2.5-flash, gemini-2.5-pro, gemini-flash-latest, gemini-pro-latest
@@ -157,8 +174,9 @@ Format as a clear, structured review."""
             prompt,
             generation_config={
                 "temperature": 0.3,
-                "max_output_tokens": 2000,
-            }
+                "max_output_tokens": max_tokens,
+            },
+            request_options={"timeout": _request_timeout()},
         )
         
         return response.text
@@ -167,26 +185,150 @@ Format as a clear, structured review."""
         raise
 
 
+def build_revision_prompt(diff: str, previous_review: str, language: Optional[str] = None) -> str:
+    """Prompt for updating an earlier review given only the changed hunks."""
+    language_str = f" ({language})" if language else ""
+    return f"""The following{language_str} code was reviewed earlier and has since been edited.
+
+Previous review:
+{previous_review}
+
+Changes since that review (unified diff with surrounding context):
+
+```diff
+{diff}
+```
+
+Update the review for the edited code:
+- Keep findings from the previous review that still apply to unchanged code.
+- Drop findings that the changes resolved.
+- Add findings for the changed lines, covering the same areas as before
+  (quality, bugs, security, performance, style).
+
+Return the complete updated review as a clear, structured review."""
+
+
+def generate_ai_review_groq(code: str, language: Optional[str] = None) -> str:
+    """Generate code review using Groq."""
+    return complete_groq(build_review_prompt(code, language))
+
+
+def generate_ai_review_ollama(code: str, language: Optional[str] = None) -> str:
+    """Generate code review using Ollama."""
+    return complete_ollama(build_review_prompt(code, language))
+
+
+def generate_ai_review_gemini(code: str, language: Optional[str] = None) -> str:
+    """Generate code review using Google Gemini."""
+    return complete_gemini(build_review_prompt(code, language))
+
+
+def complete(prompt: str, max_tokens: int = 2000) -> str:
+    """Run a prompt through the configured provider (AI_REVIEW_PROVIDER)."""
+    provider = os.getenv("AI_REVIEW_PROVIDER", "gemini").lower()
+    try:
+        if provider == "groq":
+            return complete_groq(prompt, max_tokens)
+        elif provider == "ollama":
+            return complete_ollama(prompt, max_tokens)
+        elif provider == "gemini":
+            return complete_gemini(prompt, max_tokens)
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+    except Exception as e:
+        # A request timed out by the deadline surfaces as the client's own timeout error
+        if not isinstance(e, DeadlineExceeded) and deadline_passed():
+            raise DeadlineExceeded("Review deadline passed during the provider call") from e
+        raise
+
+
 def generate_ai_review(code: str, language: Optional[str] = None) -> str:
     """
     Main entry point - tries AI providers in order of preference.
     Falls back to basic review if all fail.
     """
-    # Check which provider to use (priority order)
     provider = os.getenv("AI_REVIEW_PROVIDER", "gemini").lower()
     
     try:
-        if provider == "groq":
-            return generate_ai_review_groq(code, language)
-        elif provider == "ollama":
-            return generate_ai_review_ollama(code, language)
-        elif provider == "gemini":
-            return generate_ai_review_gemini(code, language)
-        else:
-            raise ValueError(f"Unknown provider: {provider}")
+        return complete(build_review_prompt(code, language))
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.warning(f"AI review failed ({provider}): {e}, falling back to basic review")
         # Fallback to basic review
         from app.analyzers.basic import generate_basic_review
         return generate_basic_review(code, language)
 
+
+def generate_ai_revision_review(
+    diff: str, previous_review: str, code: str, language: Optional[str] = None
+) -> str:
+    """
+    Update a parent submission's review from a diff instead of re-reviewing
+    the whole file. Falls back to a full review of `code` if the call fails.
+    """
+    try:
+        return complete(build_revision_prompt(diff, previous_review, language))
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.warning(f"Revision review failed: {e}, falling back to full review")
+        return generate_ai_review(code, language)
+
+
+# Output budget per snippet when several are reviewed in one call
+BATCH_TOKENS_PER_ITEM = 800
+
+
+def build_batch_review_prompt(items: List[Tuple[int, str, Optional[str]]]) -> str:
+    """Prompt for reviewing several (id, code, language) snippets in one call."""
+    sections = []
+    for item_id, code, language in items:
+        sections.append(f"""### Snippet {item_id}{f" ({language})" if language else ""}
+
+```{language or 'code'}
+{code}
+```""")
+    snippets = "\n\n".join(sections)
+    ids = ", ".join(f'"{item_id}"' for item_id, _, _ in items)
+    return f"""Review each of the following independent code snippets and provide constructive feedback.
+
+{snippets}
+
+For each snippet, {REVIEW_FOCUS[0].lower()}{REVIEW_FOCUS[1:]}
+
+Respond with ONLY a JSON object mapping each snippet id ({ids}) to its review as a
+markdown string, e.g. {{"{items[0][0]}": "..."}}. Do not include any other text."""
+
+
+def parse_batch_review(text: str, ids: List[int]) -> Dict[int, str]:
+    """
+    Split a batched response back into per-snippet reviews.
+    Returns only the ids that were present with a non-empty review;
+    raises ValueError if the response is not a JSON object at all.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        # Strip a ```json ... ``` fence if the model added one
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("Batch review response is not a JSON object")
+    reviews = {}
+    for item_id in ids:
+        review = data.get(str(item_id))
+        if isinstance(review, str) and review.strip():
+            reviews[item_id] = review
+    return reviews
+
+
+def generate_ai_review_batch(items: List[Tuple[int, str, Optional[str]]]) -> Dict[int, str]:
+    """
+    Review several small snippets with a single provider call.
+    Unlike generate_ai_review there is no basic-review fallback here: errors
+    propagate and missing ids are omitted so the caller can retry per item.
+    """
+    prompt = build_batch_review_prompt(items)
+    text = complete(prompt, max_tokens=BATCH_TOKENS_PER_ITEM * len(items))
+    return parse_batch_review(text, [item_id for item_id, _, _ in items])
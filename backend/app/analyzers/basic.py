@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 from typing import List, Dict
 
+from app.analyzers.python_ast import INLINE_MAX_CHARS, analyze_python, analyze_python_offloaded, get_analyzer_pool
 
-def generate_basic_review(code: str, language: str | None = None) -> str:
+
+def _is_python(language: str | None) -> bool:
+    return (language or "").lower() in ("python", "py")
+
+
+def _python_issues(code: str, offload: bool) -> List[Dict]:
+    return analyze_python_offloaded(code) if offload else analyze_python(code)
+
+
+def generate_basic_review(code: str, language: str | None = None, offload: bool = False) -> str:
+    """
+    Heuristic review used when no AI provider is available. `offload` sends
+    large Python inputs to the analyzer process pool; only the API process
+    sets it, everywhere else (e.g. RQ work horses) analyzes inline.
+    """
     issues: List[str] = []
 
     if not code or code.strip() == "":
@@ -16,7 +32,8 @@ def generate_basic_review(code: str, language: str | None = None) -> str:
         issues.append("Found TODOs; resolve or track them explicitly.")
 
     risky_calls = ["eval(", "exec(", "os.system(", "subprocess.Popen(", "rm -rf", "drop table"]
-    if any(token in code.lower() for token in [t.lower() for t in risky_calls]):
+    # Python gets precise AST-based risky-call detection below
+    if not _is_python(language) and any(token in code.lower() for token in [t.lower() for t in risky_calls]):
         issues.append("Potentially dangerous calls detected; review security implications.")
 
     # Language-aware checks
@@ -30,10 +47,9 @@ def generate_basic_review(code: str, language: str | None = None) -> str:
         if missing_semis:
             issues.append("JavaScript: Some statements may be missing semicolons.")
     elif lang in ("python", "py"):
-        if "\t" in code:
-            issues.append("Python: Mixed tabs in indentation; use spaces consistently.")
-        if "print(" in code:
-            issues.append("Python: 'print' found; avoid prints in production code.")
+        for issue in _python_issues(code, offload):
+            where = f" (line {issue['line']})" if issue["line"] else ""
+            issues.append(f"Python: {issue['message']}{where}")
     elif lang in ("java"):
         import re
         empty_catch = re.search(r"catch\s*\([^)]*\)\s*\{\s*\}", code, flags=re.IGNORECASE | re.MULTILINE)
@@ -51,8 +67,8 @@ def generate_basic_review(code: str, language: str | None = None) -> str:
     return f"{header}:\n{bullets}"
 
 
-def generate_basic_issues(code: str, language: str | None = None) -> List[Dict[str, str]]:
-    """Return structured issues for live review consumption."""
+def generate_basic_issues(code: str, language: str | None = None, offload: bool = False) -> List[Dict[str, str]]:
+    """Return structured issues for live review consumption. `offload` as for generate_basic_review."""
     issues: List[Dict[str, str]] = []
 
     def add(msg: str, severity: str = "info", rule: str = "general") -> None:
@@ -68,7 +84,7 @@ def generate_basic_issues(code: str, language: str | None = None) -> List[Dict[s
         add("Found TODOs; resolve or track them explicitly.", "info", "todo")
 
     risky_calls = ["eval(", "exec(", "os.system(", "subprocess.Popen(", "rm -rf", "drop table"]
-    if any(token in code.lower() for token in [t.lower() for t in risky_calls]):
+    if not _is_python(language) and any(token in code.lower() for token in [t.lower() for t in risky_calls]):
         add("Potentially dangerous calls detected; review security implications.", "danger", "risky")
 
     # Language-aware
@@ -81,10 +97,7 @@ def generate_basic_issues(code: str, language: str | None = None) -> List[Dict[s
         if missing_semis:
             add("Some statements may be missing semicolons.", "info", "js.semi")
     elif lang in ("python", "py"):
-        if "\t" in code:
-            add("Mixed tabs in indentation; use spaces consistently.", "warn", "py.indent")
-        if "print(" in code:
-            add("'print' found; avoid prints in production code.", "info", "py.print")
+        issues.extend(_python_issues(code, offload))
     elif lang in ("java"):
         import re
         empty_catch = re.search(r"catch\s*\([^)]*\)\s*\{\s*\}", code, flags=re.IGNORECASE | re.MULTILINE)
@@ -93,3 +106,10 @@ def generate_basic_issues(code: str, language: str | None = None) -> List[Dict[s
 
     return issues
 
+
+async def generate_basic_issues_async(code: str, language: str | None = None) -> List[Dict[str, str]]:
+    """generate_basic_issues for async callers; large Python inputs are analyzed in the process pool."""
+    if _is_python(language) and len(code) > INLINE_MAX_CHARS:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_analyzer_pool(), generate_basic_issues, code, language)
+    return generate_basic_issues(code, language)
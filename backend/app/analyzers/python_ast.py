@@ -0,0 +1,210 @@
+"""
+AST-based Python analyzer.
+Parses code with `ast` and runs visitor rules, so strings and comments no
+longer trigger false positives. Parsed trees are kept in a small LRU keyed by
+content hash, and large inputs can be analyzed in a process pool to keep
+CPU-heavy parsing off the API / WebSocket process.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import io
+import os
+import threading
+import tokenize
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+# Parsed trees kept per process; repeated live-review messages skip re-parsing
+PARSE_CACHE_SIZE = int(os.getenv("PY_ANALYZER_CACHE_SIZE", "256"))
+# Pool size for offloaded analysis; inputs at or under INLINE_MAX_CHARS are analyzed in-process
+ANALYZER_WORKERS = int(os.getenv("PY_ANALYZER_WORKERS", str(min(2, os.cpu_count() or 1))))
+INLINE_MAX_CHARS = int(os.getenv("PY_ANALYZER_INLINE_MAX_CHARS", "4000"))
+
+RISKY_CALLS = {
+    "eval", "exec", "compile", "__import__",
+    "os.system", "os.popen", "pickle.loads", "pickle.load", "marshal.loads",
+    "yaml.load", "subprocess.Popen", "subprocess.call", "subprocess.run",
+    "subprocess.check_call", "subprocess.check_output",
+}
+MUTABLE_LITERALS = (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)
+MUTABLE_FACTORIES = {"list", "dict", "set", "bytearray", "defaultdict", "OrderedDict"}
+
+_parse_cache: "OrderedDict[str, ast.AST]" = OrderedDict()
+# The cache is shared by FastAPI threadpool threads
+_parse_cache_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def parse_cached(code: str) -> ast.AST:
+    """ast.parse with an LRU keyed by the code's content hash. Raises SyntaxError."""
+    key = hashlib.sha1(code.encode("utf-8", "surrogatepass")).hexdigest()
+    with _parse_cache_lock:
+        tree = _parse_cache.get(key)
+        if tree is not None:
+            _parse_cache.move_to_end(key)
+            return tree
+    tree = ast.parse(code)
+    with _parse_cache_lock:
+        _parse_cache[key] = tree
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return tree
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    """'os.system' for Attribute(Name('os'), 'system'), 'eval' for Name('eval')."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return None
+
+
+class PythonRuleVisitor(ast.NodeVisitor):
+    """Collects rule violations as live-review issue dicts."""
+
+    def __init__(self) -> None:
+        self.issues: List[Dict] = []
+        self.imports: Dict[str, ast.AST] = {}
+        self.used_names: set[str] = set()
+        self.exported: set[str] = set()
+
+    def add(self, node: ast.AST, msg: str, severity: str, rule: str) -> None:
+        self.issues.append({"message": msg, "severity": severity, "rule": rule, "line": getattr(node, "lineno", None)})
+
+    def visit_Call(self, node: ast.Call) -> None:
+        name = _dotted_name(node.func)
+        if name in RISKY_CALLS and not self._is_safe_variant(name, node):
+            self.add(node, f"Call to '{name}'; review security implications.", "danger", "py.risky")
+        elif name == "print":
+            self.add(node, "'print' found; avoid prints in production code.", "info", "py.print")
+        self.generic_visit(node)
+
+    @staticmethod
+    def _is_safe_variant(name: str, node: ast.Call) -> bool:
+        keywords = {kw.arg: kw.value for kw in node.keywords}
+        if name.startswith("subprocess."):
+            # Argument lists without a shell are not injectable
+            shell = keywords.get("shell")
+            return not (isinstance(shell, ast.Constant) and shell.value is True)
+        if name == "yaml.load":
+            return "Loader" in keywords
+        return False
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.type is None:
+            self.add(node, "Bare 'except:' catches everything, including KeyboardInterrupt; name the exception.", "warn", "py.bare_except")
+        self.generic_visit(node)
+
+    def _check_defaults(self, node: ast.FunctionDef | ast.AsyncFunctionDef | ast.Lambda) -> None:
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            mutable = isinstance(default, MUTABLE_LITERALS) or (
+                isinstance(default, ast.Call) and _dotted_name(default.func) in MUTABLE_FACTORIES
+            )
+            if mutable:
+                self.add(default, "Mutable default argument is shared between calls; default to None instead.", "warn", "py.mutable_default")
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._check_defaults(node)
+        self.generic_visit(node)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._check_defaults(node)
+        self.generic_visit(node)
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self._check_defaults(node)
+        self.generic_visit(node)
+
+    def visit_Compare(self, node: ast.Compare) -> None:
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and right.value is None:
+                self.add(node, "Compare to None with 'is' / 'is not'.", "info", "py.none_compare")
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports[alias.asname or alias.name.split(".")[0]] = node
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.name == "*":
+                self.add(node, f"Wildcard import from '{node.module}'; import names explicitly.", "warn", "py.star_import")
+            elif node.module != "__future__":
+                self.imports[alias.asname or alias.name] = node
+
+    def visit_Name(self, node: ast.Name) -> None:
+        self.used_names.add(node.id)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        # Names listed in __all__ count as used
+        if any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            if isinstance(node.value, (ast.List, ast.Tuple)):
+                self.exported.update(
+                    e.value for e in node.value.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)
+                )
+        self.generic_visit(node)
+
+    def finish(self) -> List[Dict]:
+        for name, node in self.imports.items():
+            if name not in self.used_names and name not in self.exported:
+                self.add(node, f"'{name}' is imported but unused.", "info", "py.unused_import")
+        return sorted(self.issues, key=lambda i: i["line"] or 0)
+
+
+def _tab_indented(code: str) -> bool:
+    """True if any indentation token contains a tab (tabs inside strings don't count)."""
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type == tokenize.INDENT and "\t" in tok.string:
+                return True
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return False
+
+
+def analyze_python(code: str) -> List[Dict]:
+    """Run all Python rules in-process and return live-review issue dicts."""
+    try:
+        tree = parse_cached(code)
+    except SyntaxError as e:
+        return [{"message": f"Syntax error: {e.msg}.", "severity": "danger", "rule": "py.syntax", "line": e.lineno}]
+
+    visitor = PythonRuleVisitor()
+    visitor.visit(tree)
+    issues = visitor.finish()
+    if _tab_indented(code):
+        issues.append({"message": "Tabs in indentation; use spaces consistently.", "severity": "warn", "rule": "py.indent", "line": None})
+    return issues
+
+
+def get_analyzer_pool() -> ProcessPoolExecutor:
+    """Process pool for offloaded analysis, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=ANALYZER_WORKERS)
+    return _pool
+
+
+def analyze_python_offloaded(code: str) -> List[Dict]:
+    """
+    analyze_python for sync callers in the API process; inputs over
+    INLINE_MAX_CHARS are parsed in the process pool. Not for use in RQ work
+    horses, which exit without shutting the pool down.
+    """
+    if len(code) <= INLINE_MAX_CHARS:
+        return analyze_python(code)
+    return get_analyzer_pool().submit(analyze_python, code).result()
+
+
+def shutdown_analyzer_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -0,0 +1,177 @@
+"""
+Near-duplicate detection for code.
+Code is normalized (comments and whitespace dropped, locally bound names anonymized),
+split into token shingles and summarized with a MinHash signature. LSH band
+keys derived from the signature let similar code be found by exact lookups.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import struct
+from typing import List
+
+NUM_PERMUTATIONS = 64
+# 8 bands x 8 rows: pairs at Jaccard 0.9 collide in some band ~99% of the time, pairs at 0.5 ~3%
+LSH_BANDS = 8
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed so signatures are stable across processes and restarts
+_rng = random.Random(1729)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# String literals are matched as whole tokens before any comment syntax, so "http://..." or "#fff" survive
+_STRING = r"""\"\"\"[\s\S]*?\"\"\"|'''[\s\S]*?'''|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`"""
+_IDENTIFIER = r"[A-Za-z_][A-Za-z0-9_]*"
+_OPERATOR = r"==|!=|<=|>=|=>|->|:=|\*\*=?|//=?|<<=?|>>=?|&&|\|\||\+\+|--|[-+*/%&|^@]="
+_TOKEN = rf"{_STRING}|{_IDENTIFIER}|\d+(?:\.\d+)?|{_OPERATOR}|\S"
+
+# Comment syntax by language; `//` is floor division in Python, so only C-style languages strip it
+HASH_COMMENT_LANGUAGES = frozenset({"python", "py", "ruby", "rb", "shell", "bash", "sh", "perl", "r", "yaml"})
+_HASH_TOKEN_RE = re.compile(rf"(#[^\n]*)|({_TOKEN})")
+_C_TOKEN_RE = re.compile(rf"(//[^\n]*|/\*[\s\S]*?\*/)|({_TOKEN})")
+# Unknown language: keep everything rather than guess which characters start a comment
+_PLAIN_TOKEN_RE = re.compile(rf"()({_TOKEN})")
+_IDENTIFIER_RE = re.compile(_IDENTIFIER)
+
+KEYWORDS = frozenset("""
+    and as assert async await break case catch class const continue def default del do elif else
+    except export extends false final finally for from function global if implements import in
+    instanceof interface is lambda let new none nonlocal not null or pass private protected public
+    raise return self static super switch this throw throws true try typeof var void while with yield
+    int float str bool list dict set tuple print len range string boolean char long double
+""".split())
+
+# Keywords after which the next identifier is a name being defined
+_DEFINING_KEYWORDS = frozenset({"def", "class", "function", "let", "var", "const"})
+_ASSIGN_OPS = frozenset({"=", ":=", "**=", "//=", "<<=", ">>=", "+=", "-=", "*=", "/=", "%=", "&=", "|=", "^=", "@="})
+# Loop / lambda target lists, and the tokens that close them
+_TARGET_LISTS = {"for": frozenset({"in", "of", ":", ";", "{"}), "lambda": frozenset({":"})}
+
+
+def _tokenize(code: str, language: str | None) -> List[str]:
+    lang = (language or "").lower()
+    if lang in HASH_COMMENT_LANGUAGES:
+        pattern = _HASH_TOKEN_RE
+    elif lang:
+        pattern = _C_TOKEN_RE
+    else:
+        pattern = _PLAIN_TOKEN_RE
+    return [token for _comment, token in pattern.findall(code) if token]
+
+
+def _is_name(token: str) -> bool:
+    return bool(_IDENTIFIER_RE.fullmatch(token)) and token.lower() not in KEYWORDS
+
+
+def _bound_names(tokens: List[str]) -> set[str]:
+    """Names the code binds itself: def/class names, parameters, and assignment / loop targets."""
+    bound = set()
+    depth = 0
+    expect_params = False
+    params_depth = None  # bracket depth of an open def/function parameter list
+    in_default = False   # inside a parameter's annotation or default value
+    target_end = None    # closing tokens of an open for/lambda target list
+    for i, token in enumerate(tokens):
+        prev = tokens[i - 1] if i else ""
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else ""
+        if token in ("(", "["):
+            depth += 1
+            if token == "(" and expect_params:
+                params_depth, in_default, expect_params = depth, False, False
+            continue
+        if token in (")", "]"):
+            if depth == params_depth:
+                params_depth = None
+            depth = max(depth - 1, 0)
+            continue
+        if target_end is not None and token in target_end:
+            target_end = None
+        if token in _TARGET_LISTS:
+            target_end = _TARGET_LISTS[token]
+        if token in ("def", "function"):
+            expect_params = True
+        elif expect_params and depth == 0 and token in (":", "{"):
+            expect_params = False
+
+        if depth == params_depth:
+            if token == ",":
+                in_default = False
+            elif token in (":", "="):
+                in_default = True
+            elif not in_default and _is_name(token) and nxt in (",", ")", ":", "="):
+                bound.add(token)
+            continue
+        if not _is_name(token) or prev == ".":
+            continue
+        if prev in _DEFINING_KEYWORDS or (target_end is not None and nxt not in (".", "(", "[")):
+            bound.add(token)
+        elif nxt in _ASSIGN_OPS and (depth == 0 or prev not in ("(", ",")):
+            # At depth > 0, `name=` right after "(" or "," is a keyword argument, not a binding
+            bound.add(token)
+    return bound
+
+
+def normalize_tokens(code: str, language: str | None = None) -> List[str]:
+    """
+    Tokenize code with comments removed and locally bound names anonymized.
+    Called functions, attributes and imported names are kept, so `eval(x)`
+    and `json.loads(x)` stay different.
+    """
+    tokens = _tokenize(code, language)
+    bound = _bound_names(tokens)
+    return [
+        "_id" if token in bound and (i == 0 or tokens[i - 1] != ".") else token
+        for i, token in enumerate(tokens)
+    ]
+
+
+def shingle_hashes(tokens: List[str], size: int = SHINGLE_SIZE) -> set[int]:
+    if not tokens:
+        return set()
+    if len(tokens) < size:
+        size = len(tokens)
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode(), digest_size=8).digest(), "little")
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+def minhash_signature(code: str, language: str | None = None) -> List[int] | None:
+    """MinHash signature of the code's normalized shingles, or None if there is nothing to hash."""
+    shingles = shingle_hashes(normalize_tokens(code, language))
+    if not shingles:
+        return None
+    return [
+        min((a * x + b) % _MERSENNE_PRIME for x in shingles)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity between two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERMUTATIONS
+
+
+def lsh_buckets(signature: List[int]) -> List[int]:
+    """One signed 64-bit bucket key per band (fits a BIGINT column)."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<B{LSH_ROWS}Q", band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def pack_signature(signature: List[int]) -> bytes:
+    return struct.pack(f"<{NUM_PERMUTATIONS}Q", *signature)
+
+
+def unpack_signature(data: bytes) -> List[int]:
+    return list(struct.unpack(f"<{NUM_PERMUTATIONS}Q", data))
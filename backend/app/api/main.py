@@ -4,7 +4,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import WebSocket, WebSocketDisconnect
 from app.api.submissions import router as submissions_router
-from app.analyzers.basic import generate_basic_issues
+from app.analyzers.basic import generate_basic_issues_async
+from app.analyzers.python_ast import shutdown_analyzer_pool
 
 app = FastAPI(title="ACRA Backend")
 
@@ -21,6 +22,11 @@ app.add_middleware(
 app.include_router(submissions_router, prefix="/api")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_analyzer_pool()
+
+
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
@@ -36,7 +42,7 @@ async def ws_review(ws: WebSocket):
                 payload = json.loads(data)
                 code = payload.get("code", "")
                 language = payload.get("language")
-                issues = generate_basic_issues(code, language)
+                issues = await generate_basic_issues_async(code, language)
                 await ws.send_text(json.dumps({"issues": issues}))
             except Exception as e:
                 await ws.send_text(json.dumps({"error": str(e)}))
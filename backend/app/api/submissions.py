@@ -1,11 +1,18 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.submission import Submission
 from app.schemas.submission import SubmissionCreate, SubmissionOut
-from app.jobs.review_job import get_queue, run_review
-from app.middleware.clerk_auth import get_current_user_optional
+from app.jobs.review_job import cancel_review, enqueue_review, get_queue, review_deadline_from_now, run_review
+from app.jobs.admission import admit_submission
+from app.analyzers.basic import generate_basic_review
+from app.middleware.clerk_auth import get_current_user_optional, get_current_user_required
+from app import export
+from app.export import decode_cursor, stream_export
 
 router = APIRouter(prefix="/submissions", tags=["submissions"])
 
@@ -15,25 +22,70 @@ logger = logging.getLogger(__name__)
 @router.post("", response_model=SubmissionOut)
 def create_submission(
     payload: SubmissionCreate, 
+    request: Request,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user_optional)
 ):
+    parent = db.get(Submission, payload.parent_id) if payload.parent_id is not None else None
+    if payload.parent_id is not None and not parent:
+        raise HTTPException(status_code=404, detail="Parent submission not found")
+
+    owner_id = None if current_user["id"] == "anonymous" else current_user["id"]
+
+    # Admission control: projected queue wait, then per-user quota
+    user_key = current_user["id"]
+    if user_key == "anonymous" and request.client:
+        # Don't let all anonymous callers share (and exhaust) a single bucket
+        user_key = f"anonymous:{request.client.host}"
+    q = get_queue()
+    decision = admit_submission(q, user_key)
+    if decision.action == "reject":
+        logger.info("Rejected submission for %s: %s", user_key, decision.reason)
+        raise HTTPException(
+            status_code=429,
+            detail=decision.reason,
+            headers={"Retry-After": str(decision.retry_after)},
+        )
+
+    if decision.action == "degrade":
+        # Queue is overloaded - answer immediately with a basic review instead of queueing
+        logger.info("Degrading submission for %s to basic review: %s", user_key, decision.reason)
+        s = Submission(
+            code=payload.code,
+            language=payload.language,
+            review=generate_basic_review(payload.code, payload.language, offload=True),
+            status="reviewed",
+            parent_id=payload.parent_id,
+            user_id=owner_id,
+        )
+        db.add(s)
+        db.commit()
+        db.refresh(s)
+        return s
+
     # Create as pending first
-    s = Submission(code=payload.code, language=payload.language, status="pending")
+    s = Submission(
+        code=payload.code, language=payload.language, status="pending",
+        parent_id=payload.parent_id, user_id=owner_id,
+    )
     db.add(s)
     db.commit()
     db.refresh(s)
 
+    # A newer revision supersedes any unfinished review of its parent, if both belong to the caller
+    supersedes = parent is not None and owner_id is not None and parent.user_id == owner_id
+    if supersedes and cancel_review(db, parent):
+        logger.info("Submission id=%s superseded parent id=%s", s.id, parent.id)
+
     # Try to enqueue async review job
     try:
-        q = get_queue()
-        q.enqueue(run_review, s.id)
+        enqueue_review(q, s.id)
         logger.info("Enqueued review job for submission id=%s", s.id)
     except Exception as e:
         # If queue fails (Redis not running), process synchronously as fallback
         logger.warning("Failed to enqueue review for submission id=%s, processing synchronously: %s", s.id, e)
         try:
-            run_review(s.id)
+            run_review(s.id, review_deadline_from_now())
             db.refresh(s)
             logger.info("Review processed synchronously for submission id=%s", s.id)
         except Exception as sync_error:
@@ -42,6 +94,37 @@ def create_submission(
     return s
 
 
+@router.get("/export")
+def export_submissions(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    language: Optional[str] = None,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user_required)
+):
+    """Stream the full submission history. Each row carries a cursor token to resume from."""
+    if current_user["id"] not in export.EXPORT_ALLOWED_USERS:
+        raise HTTPException(status_code=403, detail="Not allowed to export submissions")
+    try:
+        after_id = decode_cursor(cursor) if cursor else 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"submissions.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_export(format, gzip, since, until, status, language, after_id),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
 @router.get("/{submission_id}", response_model=SubmissionOut)
 def get_submission(submission_id: int, db: Session = Depends(get_db)):
     s = db.get(Submission, submission_id)
@@ -49,6 +132,24 @@ def get_submission(submission_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Submission not found")
     return s
 
+@router.post("/{submission_id}/cancel", response_model=SubmissionOut)
+def cancel_submission(
+    submission_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_required)
+):
+    """Stop a pending or in-progress review so no more provider time is spent on it."""
+    s = db.get(Submission, submission_id)
+    if not s:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    if s.user_id is None or s.user_id != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not allowed to cancel this submission")
+    if not cancel_review(db, s):
+        raise HTTPException(status_code=409, detail=f"Submission is already {s.status}")
+    db.refresh(s)
+    return s
+
+
 @router.get("", response_model=list[SubmissionOut])
 def list_submissions(
     db: Session = Depends(get_db),
@@ -0,0 +1,185 @@
+"""
+Streaming export of submissions and reviews.
+Rows are read through a server-side cursor and written out incrementally as
+NDJSON or CSV (optionally gzipped), so memory stays flat regardless of size.
+
+CLI usage:
+    python -m app.export --format csv --gzip --status reviewed > reviews.csv.gz
+"""
+import argparse
+import base64
+import csv
+import io
+import json
+import os
+import sys
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file before app.database builds its engine
+load_dotenv()
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.submission import Submission
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_FIELDS = ["id", "code", "language", "review", "status", "created_at", "parent_id"]
+
+# Clerk user ids allowed to export over the API (the export covers every user's code)
+EXPORT_ALLOWED_USERS = [u for u in os.getenv("EXPORT_ALLOWED_USERS", "").split(",") if u]
+
+# Rows fetched per round trip from the server-side cursor
+DEFAULT_BATCH_SIZE = 1000
+# Output is coalesced into chunks of roughly this many bytes before being yielded
+CHUNK_SIZE = 64 * 1024
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque resume token pointing just past the given submission id."""
+    raw = json.dumps({"after_id": last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> int:
+    """Inverse of encode_cursor. Raises ValueError on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return int(json.loads(raw)["after_id"])
+    except Exception as e:
+        raise ValueError(f"Invalid export cursor: {token!r}") from e
+
+
+def iter_rows(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    language: Optional[str] = None,
+    after_id: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Yield matching submissions as dicts in id order.
+    Selects plain columns rather than ORM entities so nothing accumulates
+    in the session identity map, and streams results in batches.
+    """
+    stmt = select(*(getattr(Submission, f) for f in EXPORT_FIELDS)).where(Submission.id > after_id)
+    if since:
+        stmt = stmt.where(Submission.created_at >= since)
+    if until:
+        stmt = stmt.where(Submission.created_at < until)
+    if status:
+        stmt = stmt.where(Submission.status == status)
+    if language:
+        stmt = stmt.where(Submission.language == language)
+    stmt = stmt.order_by(Submission.id).execution_options(stream_results=True, yield_per=batch_size)
+
+    for row in db.execute(stmt):
+        record = dict(row._mapping)
+        if record["created_at"] is not None:
+            record["created_at"] = record["created_at"].isoformat()
+        record["cursor"] = encode_cursor(record["id"])
+        yield record
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+
+def iter_csv(records: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS + ["cursor"])
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_chunks(parts: Iterable[str], compress: bool = False) -> Iterator[bytes]:
+    """Encode text parts to bytes, gzip them if requested, and coalesce into chunks."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip container
+    pending = []
+    size = 0
+    for part in parts:
+        data = part.encode()
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            pending.append(data)
+            size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if compressor:
+        pending.append(compressor.flush())
+    if pending:
+        yield b"".join(pending)
+
+
+def stream_export(
+    fmt: str = "ndjson",
+    compress: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    language: Optional[str] = None,
+    after_id: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """
+    Full export pipeline. Owns its own session because it outlives the
+    request dependency when used behind a StreamingResponse.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    db = SessionLocal()
+    try:
+        records = iter_rows(db, since, until, status, language, after_id, batch_size)
+        parts = iter_csv(records) if fmt == "csv" else iter_ndjson(records)
+        yield from iter_chunks(parts, compress)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export submissions and reviews.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the output")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created_at >= this ISO timestamp")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created_at < this ISO timestamp")
+    parser.add_argument("--status")
+    parser.add_argument("--language")
+    parser.add_argument("--cursor", help="resume after the row this token came from")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--output", "-o", help="write to this file instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        after_id = decode_cursor(args.cursor) if args.cursor else 0
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in stream_export(
+            args.format, args.gzip, args.since, args.until,
+            args.status, args.language, after_id, args.batch_size,
+        ):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Admission control for review jobs.
+Looks at live queue depth and worker capacity before accepting new work,
+and enforces per-user token-bucket quotas stored in Redis.
+"""
+import math
+import os
+import time
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from redis import Redis
+from rq import Queue, Worker
+
+logger = logging.getLogger(__name__)
+
+# Maximum projected wait (seconds) a new submission may face before we shed load
+REVIEW_WAIT_SLO_SECONDS = float(os.getenv("REVIEW_WAIT_SLO_SECONDS", "60"))
+# What to do when the SLO would be exceeded: "reject" (429) or "degrade" (basic review only)
+ADMISSION_OVERLOAD_POLICY = os.getenv("ADMISSION_OVERLOAD_POLICY", "reject").lower()
+# Fallback estimate of a single review's duration until real timings are recorded
+REVIEW_DEFAULT_SECONDS = float(os.getenv("REVIEW_DEFAULT_SECONDS", "10"))
+
+# Per-user token bucket: sustained rate (tokens/second) and burst size
+USER_QUOTA_RATE = float(os.getenv("USER_QUOTA_RATE", "0.2"))
+USER_QUOTA_BURST = float(os.getenv("USER_QUOTA_BURST", "10"))
+
+AVG_DURATION_KEY = "acra:reviews:avg_seconds"
+QUOTA_KEY_PREFIX = "acra:quota:"
+# Weight given to the newest sample in the moving average of review durations
+DURATION_EWMA_ALPHA = 0.2
+
+# Refill and take one token atomically. Returns {allowed, seconds_until_next_token}.
+# The wait is returned as a string because Redis truncates Lua numbers to integers.
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+@dataclass
+class AdmissionDecision:
+    """Outcome of admission control for a single submission."""
+    action: str  # "accept", "degrade" or "reject"
+    retry_after: int = 0
+    reason: Optional[str] = None
+
+
+def projected_wait_seconds(queue_depth: int, workers: int, avg_seconds: float) -> float:
+    """Estimated time until a newly enqueued job finishes."""
+    return (queue_depth + 1) * avg_seconds / max(workers, 1)
+
+
+def get_average_review_seconds(conn: Redis) -> float:
+    """Moving average of recent review durations, or the configured default."""
+    value = conn.get(AVG_DURATION_KEY)
+    return float(value) if value else REVIEW_DEFAULT_SECONDS
+
+
+def record_review_duration(conn: Redis, seconds: float) -> None:
+    """Fold a completed review's duration into the moving average."""
+    value = conn.get(AVG_DURATION_KEY)
+    if value:
+        seconds = DURATION_EWMA_ALPHA * seconds + (1 - DURATION_EWMA_ALPHA) * float(value)
+    conn.set(AVG_DURATION_KEY, seconds)
+
+
+def check_queue_capacity(queue: Queue) -> AdmissionDecision:
+    """Compare projected wait against the SLO for the given queue."""
+    depth = queue.count
+    workers = Worker.count(queue=queue)
+    wait = projected_wait_seconds(depth, workers, get_average_review_seconds(queue.connection))
+    if wait <= REVIEW_WAIT_SLO_SECONDS:
+        return AdmissionDecision("accept")
+
+    reason = f"Review queue is busy (projected wait {wait:.0f}s, {depth} queued, {workers} workers)"
+    if ADMISSION_OVERLOAD_POLICY == "degrade":
+        return AdmissionDecision("degrade", reason=reason)
+    return AdmissionDecision("reject", retry_after=max(1, math.ceil(wait - REVIEW_WAIT_SLO_SECONDS)), reason=reason)
+
+
+def consume_user_token(conn: Redis, user_key: str) -> tuple[bool, float]:
+    """Take one token from the user's bucket. Returns (allowed, seconds until a token is available)."""
+    allowed, wait = conn.eval(
+        _TOKEN_BUCKET_LUA, 1, f"{QUOTA_KEY_PREFIX}{user_key}",
+        USER_QUOTA_RATE, USER_QUOTA_BURST, time.time(),
+    )
+    return bool(int(allowed)), float(wait)
+
+
+def admit_submission(queue: Queue, user_key: str) -> AdmissionDecision:
+    """
+    Decide whether a new submission may be enqueued.
+    Queue capacity is checked first so a submission rejected for overload
+    doesn't also spend the caller's quota (and lengthen their Retry-After).
+    Accepted and degraded submissions both do work, so both take a token.
+    Fails open if Redis is unreachable.
+    """
+    try:
+        decision = check_queue_capacity(queue)
+        if decision.action == "reject":
+            return decision
+        allowed, wait = consume_user_token(queue.connection, user_key)
+        if not allowed:
+            return AdmissionDecision(
+                "reject",
+                retry_after=max(1, math.ceil(wait)),
+                reason="Submission quota exceeded; please slow down",
+            )
+        return decision
+    except Exception as e:
+        logger.warning("Admission control unavailable, accepting submission: %s", e)
+        return AdmissionDecision("accept")
@@ -0,0 +1,129 @@
+"""
+Micro-batching of small submissions.
+When a worker picks up a small snippet it briefly collects other pending
+small snippets and reviews them all with one provider call, splitting the
+response back onto the individual Submission rows.
+"""
+import os
+import time
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.submission import Submission
+from app.analyzers.ai import DeadlineExceeded, generate_ai_review, generate_ai_review_batch
+from app.jobs import review_reuse
+
+logger = logging.getLogger(__name__)
+
+REVIEW_BATCHING = os.getenv("REVIEW_BATCHING", "true").lower() in ("1", "true", "yes")
+# Snippets at or under these limits are eligible for batching
+BATCH_MAX_LINES = int(os.getenv("REVIEW_BATCH_MAX_LINES", "50"))
+BATCH_MAX_CHARS = int(os.getenv("REVIEW_BATCH_MAX_CHARS", "4000"))
+# A batch closes after this many items or this long, whichever comes first
+BATCH_MAX_ITEMS = int(os.getenv("REVIEW_BATCH_MAX_ITEMS", "8"))
+BATCH_WINDOW_MS = int(os.getenv("REVIEW_BATCH_WINDOW_MS", "250"))
+BATCH_POLL_MS = 50
+
+
+def is_batchable(s: Submission) -> bool:
+    # Revisions go through the diff-based path instead
+    return (
+        s.parent_id is None
+        and len(s.code) <= BATCH_MAX_CHARS
+        and len(s.code.splitlines()) <= BATCH_MAX_LINES
+    )
+
+
+def claim_pending_small(db: Session, exclude: List[int], limit: int) -> List[Submission]:
+    """
+    Atomically move up to `limit` small pending submissions to "processing".
+    SKIP LOCKED lets concurrent workers build batches without double-claiming.
+    """
+    stmt = (
+        select(Submission)
+        .where(Submission.status == "pending")
+        .where(Submission.id.not_in(exclude))
+        .where(Submission.parent_id.is_(None))
+        .where(func.length(Submission.code) <= BATCH_MAX_CHARS)
+        .order_by(Submission.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = []
+    for s in db.execute(stmt).scalars():
+        if is_batchable(s):
+            s.status = "processing"
+            claimed.append(s)
+    db.commit()
+    return claimed
+
+
+def collect_batch(db: Session, first: Submission) -> List[Submission]:
+    """Gather pending small snippets alongside `first` until the batch is full or the window closes."""
+    batch = [first]
+    deadline = time.monotonic() + BATCH_WINDOW_MS / 1000
+    while len(batch) < BATCH_MAX_ITEMS:
+        batch += claim_pending_small(db, [s.id for s in batch], BATCH_MAX_ITEMS - len(batch))
+        if len(batch) >= BATCH_MAX_ITEMS or time.monotonic() >= deadline:
+            break
+        time.sleep(BATCH_POLL_MS / 1000)
+    return batch
+
+
+def review_batch(
+    db: Session,
+    batch: List[Submission],
+    signatures: Optional[Dict[int, Optional[List[int]]]] = None,
+) -> None:
+    """
+    Review a batch in one call and store the results. Items the batched
+    response did not cover (or the whole batch, if it failed to parse) are
+    reviewed individually. Each item is committed as soon as its review is
+    stored. `signatures` holds MinHash signatures already computed (and
+    checked for reuse) by the caller.
+    """
+    signatures = dict(signatures or {})
+    to_review = []
+    for s in batch:
+        if s.id in signatures:
+            to_review.append(s)
+            continue
+        reused, signatures[s.id] = review_reuse.reuse_or_signature(db, s)
+        if reused:
+            s.review = reused
+            s.status = "reviewed"
+            db.add(s)
+            db.commit()
+        else:
+            to_review.append(s)
+
+    reviews = {}
+    if len(to_review) > 1:
+        try:
+            reviews = generate_ai_review_batch([(s.id, s.code, s.language) for s in to_review])
+            logger.info(f"Batched review covered {len(reviews)}/{len(to_review)} submissions")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Batched review of {len(to_review)} submissions failed, reviewing individually: {e}")
+
+    for s in to_review:
+        db.refresh(s)
+        if s.status == "cancelled":
+            # Cancelled while the batch was in flight; don't pay for an individual review
+            continue
+        review = reviews.get(s.id)
+        if review is None:
+            review = generate_ai_review(s.code, s.language)
+            db.refresh(s)
+            if s.status == "cancelled":
+                continue
+        s.review = review
+        s.status = "reviewed"
+        db.add(s)
+        review_reuse.index_submission(db, s, signatures.get(s.id))
+        # Commit per item so a later failure (deadline, job timeout) can't discard paid-for reviews
+        db.commit()
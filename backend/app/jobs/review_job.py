@@ -1,56 +1,162 @@
 import os
-from rq import Queue
+import time
+import logging
+from typing import Optional
+from rq import Queue, get_current_job
+from rq.command import send_stop_job_command
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
 from redis import Redis
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
 from app.models.submission import Submission
-from app.analyzers.ai import generate_ai_review
+from app.analyzers.ai import DeadlineExceeded, generate_ai_review, review_deadline
+from app.jobs.admission import record_review_duration
+from app.jobs import batch_review, review_reuse, revision_review
 
 
-def get_queue() -> Queue:
+def get_redis() -> Redis:
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-    conn = Redis.from_url(redis_url)
-    return Queue("reviews", connection=conn)
+    return Redis.from_url(redis_url)
+
+
+# Seconds a review may take from submission before it is no longer worth finishing
+REVIEW_DEADLINE_SECONDS = float(os.getenv("REVIEW_DEADLINE_SECONDS", "300"))
+# RQ's hard job timeout sits past the deadline, so the deadline fires first and
+# the job has time to mark its submissions cancelled (RQ's own default is 180s)
+REVIEW_JOB_TIMEOUT_MARGIN = 30
+
+
+def get_queue() -> Queue:
+    return Queue("reviews", connection=get_redis())
+
+
+def review_job_id(submission_id: int) -> str:
+    """Deterministic RQ job id so a submission's job can be found again to cancel it."""
+    return f"review-{submission_id}"
+
+
+def review_deadline_from_now() -> float:
+    return time.time() + REVIEW_DEADLINE_SECONDS
+
+
+def enqueue_review(q: Queue, submission_id: int) -> Job:
+    return q.enqueue(
+        run_review, submission_id, review_deadline_from_now(),
+        job_id=review_job_id(submission_id),
+        job_timeout=int(REVIEW_DEADLINE_SECONDS + REVIEW_JOB_TIMEOUT_MARGIN),
+    )
+
+
+def cancel_review(db: Session, s: Submission) -> bool:
+    """
+    Mark a pending or processing submission cancelled and stop its job:
+    queued jobs are cancelled, a running job's work horse is stopped, which
+    aborts any in-flight provider request. A job reviewing a batch is left
+    running (killing it would strand the other members in "processing"); it
+    drops the cancelled item at its next status check. Returns False if there
+    was nothing left to cancel.
+    """
+    logger = logging.getLogger(__name__)
+    if s.status not in ("pending", "processing"):
+        return False
+    s.status = "cancelled"
+    db.add(s)
+    db.commit()
+
+    try:
+        conn = get_redis()
+        job = Job.fetch(review_job_id(s.id), connection=conn)
+        if job.get_status() == JobStatus.STARTED:
+            if len(job.meta.get("batch_ids", [])) > 1:
+                logger.info(f"Not stopping batch job {job.id}; it will skip submission {s.id}")
+            else:
+                send_stop_job_command(conn, job.id)
+        elif job.get_status() in (JobStatus.QUEUED, JobStatus.DEFERRED, JobStatus.SCHEDULED):
+            job.cancel()
+    except NoSuchJobError:
+        pass
+    except Exception as e:
+        # The status flag alone still stops the worker at its next checkpoint
+        logger.warning(f"Could not stop review job for submission {s.id}: {e}")
+    logger.info(f"Cancelled review for submission {s.id}")
+    return True
+
+
+def _claim(db: Session, submission_id: int, status: str) -> bool:
+    """
+    Atomically move a pending (or previously failed) submission to `status`.
+    False if another worker, e.g. a batch leader's SKIP LOCKED claim, got it first.
+    """
+    result = db.execute(
+        update(Submission)
+        .where(Submission.id == submission_id)
+        .where(Submission.status.in_(("pending", "error")))
+        .values(status=status)
+    )
+    db.commit()
+    return result.rowcount == 1
+
 
+def _cancelled(db: Session, s: Submission) -> bool:
+    """Re-read the row; True if the submission was cancelled while we worked on it."""
+    db.refresh(s)
+    return s.status == "cancelled"
 
-def run_review(submission_id: int) -> None:
-    """Process a code review for a submission."""
-    import logging
+
+def run_review(submission_id: int, deadline: Optional[float] = None) -> None:
+    """
+    Process a code review for a submission.
+    `deadline` (epoch seconds) bounds all provider calls; once it passes the
+    review is abandoned and the submission marked cancelled.
+    """
     logger = logging.getLogger(__name__)
     
     db: Session = SessionLocal()
+    batch_ids = [submission_id]
     try:
         s = db.get(Submission, submission_id)
         if not s:
             logger.warning(f"Submission {submission_id} not found")
             return
-        
+        if deadline is not None and time.time() >= deadline:
+            if _claim(db, submission_id, "cancelled"):
+                logger.info(f"Skipping submission {submission_id}: deadline passed while queued")
+            return
+        if not _claim(db, submission_id, "processing"):
+            # Already picked up (e.g. as part of another job's batch) or no longer wanted
+            db.refresh(s)
+            logger.info(f"Skipping submission {submission_id}: already {s.status}")
+            return
+
         logger.info(f"Processing review for submission {submission_id}")
-        s.status = "processing"
-        db.add(s)
-        db.commit()
         db.refresh(s)
 
-        # Generate AI review
-        review_text = generate_ai_review(s.code, s.language)
-        
-        # Update submission with review
-        s.review = review_text
-        s.status = "reviewed"
-        db.add(s)
+        with review_deadline(deadline):
+            _review(db, s, batch_ids)
+    except DeadlineExceeded as e:
+        logger.info(f"Abandoning review for submissions {batch_ids}: {e}")
+        db.rollback()
+        for expired_id in batch_ids:
+            s = db.get(Submission, expired_id)
+            if s and s.status == "processing":
+                s.status = "cancelled"
+                db.add(s)
         db.commit()
-        
-        logger.info(f"Review completed for submission {submission_id}")
     except Exception as e:
         logger.error(f"Error processing review for submission {submission_id}: {e}", exc_info=True)
         # Update status to indicate failure
         try:
-            s = db.get(Submission, submission_id)
-            if s:
-                s.status = "error"
-                db.add(s)
-                db.commit()
+            db.rollback()
+            for failed_id in batch_ids:
+                s = db.get(Submission, failed_id)
+                # Items already reviewed (and committed) keep their review
+                if s and s.status == "processing":
+                    s.status = "error"
+                    db.add(s)
+            db.commit()
         except:
             pass
         raise
@@ -58,3 +164,83 @@ def run_review(submission_id: int) -> None:
         db.close()
 
 
+def _review(db: Session, s: Submission, batch_ids: list[int]) -> None:
+    """
+    Produce and store the review for a claimed submission. `batch_ids` is
+    extended in place with any submissions pulled into a shared batch, so
+    the caller can update all of them on failure.
+    """
+    logger = logging.getLogger(__name__)
+
+    # Revisions of an already-reviewed submission only send the diff; checked
+    # before near-duplicate reuse, which would otherwise match the parent
+    started = time.monotonic()
+    review_text = revision_review.review_revision(db, s)
+    if review_text is not None:
+        _record_duration(time.monotonic() - started)
+        if _cancelled(db, s):
+            logger.info(f"Discarding review for cancelled submission {s.id}")
+            return
+        s.review = review_text
+        s.status = "reviewed"
+        db.add(s)
+        review_reuse.index_submission(db, s, review_reuse.signature_for(s))
+        db.commit()
+        logger.info(f"Revision review completed for submission {s.id}")
+        return
+
+    # Near-duplicates of already-reviewed code reuse the stored review
+    reused, signature = review_reuse.reuse_or_signature(db, s)
+    if reused:
+        s.review = reused
+        s.status = "reviewed"
+        db.add(s)
+        db.commit()
+        logger.info(f"Review reused for submission {s.id}")
+        return
+
+    # Small snippets picked up by a worker share one provider call with their neighbours
+    if batch_review.REVIEW_BATCHING and get_current_job() and batch_review.is_batchable(s):
+        started = time.monotonic()
+        batch = batch_review.collect_batch(db, s)
+        batch_ids[:] = [b.id for b in batch]
+        _record_batch(batch_ids)
+        batch_review.review_batch(db, batch, {s.id: signature})
+        _record_duration((time.monotonic() - started) / len(batch))
+        logger.info(f"Review completed for submissions {batch_ids}")
+        return
+
+    # Generate AI review
+    started = time.monotonic()
+    review_text = generate_ai_review(s.code, s.language)
+    _record_duration(time.monotonic() - started)
+    if _cancelled(db, s):
+        logger.info(f"Discarding review for cancelled submission {s.id}")
+        return
+
+    # Update submission with review
+    s.review = review_text
+    s.status = "reviewed"
+    db.add(s)
+    review_reuse.index_submission(db, s, signature)
+    db.commit()
+
+    logger.info(f"Review completed for submission {s.id}")
+
+
+def _record_batch(batch_ids: list[int]) -> None:
+    """Note the batch on the current job so cancel_review knows not to kill it."""
+    job = get_current_job()
+    try:
+        job.meta["batch_ids"] = batch_ids
+        job.save_meta()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Could not record batch on job {job.id}: {e}")
+
+
+def _record_duration(seconds: float) -> None:
+    """Feed review timings to admission control; never fail the job over it."""
+    try:
+        record_review_duration(get_redis(), seconds)
+    except Exception as e:
+        logging.getLogger(__name__).debug(f"Could not record review duration: {e}")
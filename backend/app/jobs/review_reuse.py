@@ -0,0 +1,93 @@
+"""
+Reuse of stored reviews for near-duplicate submissions.
+Reviewed submissions are indexed by MinHash LSH buckets; before a provider
+call, the worker looks for an already-reviewed near-duplicate and copies its
+review instead.
+"""
+import os
+import logging
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.submission import Submission
+from app.models.fingerprint import SubmissionFingerprint, SubmissionLSHBucket
+from app.analyzers.similarity import (
+    estimate_similarity,
+    lsh_buckets,
+    minhash_signature,
+    pack_signature,
+    unpack_signature,
+)
+
+logger = logging.getLogger(__name__)
+
+REVIEW_REUSE = os.getenv("REVIEW_REUSE", "true").lower() in ("1", "true", "yes")
+# Minimum estimated Jaccard similarity of normalized shingles to reuse a review
+REVIEW_REUSE_THRESHOLD = float(os.getenv("REVIEW_REUSE_THRESHOLD", "0.9"))
+# Upper bound on LSH candidates verified per lookup
+MAX_CANDIDATES = 50
+
+
+def find_reusable_review(db: Session, s: Submission, signature: Optional[List[int]]) -> Optional[str]:
+    """Return the review of the most similar reviewed submission above the threshold, if any."""
+    if not REVIEW_REUSE or signature is None:
+        return None
+
+    candidate_ids = (
+        select(SubmissionLSHBucket.submission_id)
+        .where(SubmissionLSHBucket.bucket.in_(lsh_buckets(signature)))
+        .where(SubmissionLSHBucket.submission_id != s.id)
+        .distinct()
+        .limit(MAX_CANDIDATES)
+    )
+    stmt = (
+        select(Submission.id, Submission.review, SubmissionFingerprint.signature)
+        .join(SubmissionFingerprint, SubmissionFingerprint.submission_id == Submission.id)
+        .where(Submission.id.in_(candidate_ids))
+        .where(Submission.status == "reviewed")
+        .where(Submission.review.is_not(None))
+    )
+    if s.language:
+        stmt = stmt.where(Submission.language == s.language)
+    else:
+        stmt = stmt.where(Submission.language.is_(None))
+
+    best_id, best_review, best_score = None, None, 0.0
+    for candidate_id, review, packed in db.execute(stmt):
+        score = estimate_similarity(signature, unpack_signature(packed))
+        if score >= REVIEW_REUSE_THRESHOLD and score > best_score:
+            best_id, best_review, best_score = candidate_id, review, score
+    if best_review is None:
+        return None
+
+    logger.info(f"Reusing review of submission {best_id} for {s.id} (similarity {best_score:.2f})")
+    return f"_Reused from near-identical submission #{best_id} (similarity {best_score:.0%})._\n\n{best_review}"
+
+
+def index_submission(db: Session, s: Submission, signature: Optional[List[int]]) -> None:
+    """Add a freshly reviewed submission to the similarity index. Caller commits."""
+    if not REVIEW_REUSE or signature is None:
+        return
+    if s.review and s.review.startswith("Basic Review"):
+        # Provider was unavailable; don't pin the fallback onto future near-duplicates
+        return
+    db.merge(SubmissionFingerprint(submission_id=s.id, signature=pack_signature(signature)))
+    for bucket in set(lsh_buckets(signature)):
+        db.merge(SubmissionLSHBucket(bucket=bucket, submission_id=s.id))
+
+
+def reuse_or_signature(db: Session, s: Submission) -> tuple[Optional[str], Optional[List[int]]]:
+    """
+    Compute the submission's signature and look up a reusable review.
+    Returns (review or None, signature); the signature is passed back to
+    index_submission once a fresh review has been generated.
+    """
+    signature = signature_for(s)
+    return find_reusable_review(db, s, signature), signature
+
+
+def signature_for(s: Submission) -> Optional[List[int]]:
+    """MinHash signature to index `s` under, or None when reuse is disabled."""
+    return minhash_signature(s.code, s.language) if REVIEW_REUSE else None
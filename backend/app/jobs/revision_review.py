@@ -0,0 +1,66 @@
+"""
+Diff-based re-review of revised submissions.
+When a submission names a reviewed parent, only the changed hunks (with a
+little context) and the parent's review are sent to the provider, which
+returns the parent's review updated for the edits.
+"""
+import os
+import difflib
+import logging
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.submission import Submission
+from app.analyzers.ai import generate_ai_revision_review
+
+logger = logging.getLogger(__name__)
+
+# Unchanged lines of context kept around each hunk
+REVISION_CONTEXT_LINES = int(os.getenv("REVISION_CONTEXT_LINES", "3"))
+# Above this fraction of changed lines a full review is cheaper and better
+REVISION_MAX_CHANGED_RATIO = float(os.getenv("REVISION_MAX_CHANGED_RATIO", "0.5"))
+
+
+def compute_diff(old: str, new: str, context: int = REVISION_CONTEXT_LINES) -> tuple[str, int]:
+    """Unified diff of old -> new and the number of changed lines (an edited line counts once)."""
+    old_lines, new_lines = old.splitlines(), new.splitlines()
+    lines = list(difflib.unified_diff(
+        old_lines, new_lines,
+        fromfile="previous", tofile="current", lineterm="", n=context,
+    ))
+    # A replaced block of k old lines by m new lines is max(k, m) changed lines, not k + m
+    changed = sum(
+        max(i2 - i1, j2 - j1)
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes()
+        if tag != "equal"
+    )
+    return "\n".join(lines), changed
+
+
+def review_revision(db: Session, s: Submission) -> Optional[str]:
+    """
+    Review `s` relative to its parent. Returns None when the diff path does
+    not apply (no reviewed parent, or too much changed) so the caller can
+    do a full review instead.
+    """
+    if not s.parent_id:
+        return None
+    parent = db.get(Submission, s.parent_id)
+    if not parent or parent.status != "reviewed" or not parent.review:
+        logger.info(f"Parent {s.parent_id} of submission {s.id} has no review yet; doing a full review")
+        return None
+    if (parent.language or None) != (s.language or None):
+        return None
+
+    diff, changed = compute_diff(parent.code, s.code)
+    if changed == 0:
+        logger.info(f"Submission {s.id} is unchanged from parent {parent.id}; reusing its review")
+        return parent.review
+    total = max(len(s.code.splitlines()), 1)
+    if changed / total > REVISION_MAX_CHANGED_RATIO:
+        logger.info(f"Submission {s.id} changed {changed}/{total} lines from parent {parent.id}; doing a full review")
+        return None
+
+    logger.info(f"Reviewing submission {s.id} as a {changed}-line revision of {parent.id}")
+    return generate_ai_revision_review(diff, parent.review, s.code, s.language)
@@ -1,52 +1,231 @@
 """
 Clerk authentication middleware for FastAPI.
-Verifies JWT tokens from Clerk.
+Verifies Clerk session JWTs locally (RS256) against a cached JWKS, so
+requests don't pay a network round trip to Clerk. Already-verified tokens
+are remembered until they expire, so repeated status polls skip the
+signature check entirely.
 """
 import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+import jwt
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from typing import Optional
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer(auto_error=False)
 
 # Get Clerk secret key from environment
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+# Where signing keys come from: a local JWKS file, an explicit URL, or Clerk's Backend API
+CLERK_JWKS_FILE = os.getenv("CLERK_JWKS_FILE")
+CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL", "https://api.clerk.com/v1/jwks")
+# Optional claim checks: expected issuer (your Clerk Frontend API URL) and allowed azp origins
+CLERK_ISSUER = os.getenv("CLERK_ISSUER")
+CLERK_AUTHORIZED_PARTIES = [p for p in os.getenv("CLERK_AUTHORIZED_PARTIES", "").split(",") if p]
+
+JWKS_REFRESH_SECONDS = int(os.getenv("CLERK_JWKS_REFRESH_SECONDS", "3600"))
+# Unknown key ids trigger a refresh (key rotation), but no more often than this
+JWKS_MIN_REFRESH_INTERVAL = 30
+TOKEN_CACHE_SIZE = int(os.getenv("CLERK_TOKEN_CACHE_SIZE", "1024"))
+CLOCK_SKEW_SECONDS = 5
 
-if not CLERK_SECRET_KEY:
+AUTH_CONFIGURED = bool(CLERK_SECRET_KEY or CLERK_JWKS_FILE or os.getenv("CLERK_JWKS_URL"))
+
+if not AUTH_CONFIGURED:
     print("⚠️  Warning: CLERK_SECRET_KEY not set. Authentication will be optional.")
 
 
+class JWKSCache:
+    """
+    Signing keys by kid. Loaded on first use, refreshed in a background
+    thread every `refresh_seconds`, and refreshed on demand when a token
+    names a kid we haven't seen (Clerk rotated its keys).
+    """
+
+    def __init__(self, url: Optional[str] = None, file: Optional[str] = None,
+                 secret_key: Optional[str] = None, refresh_seconds: int = JWKS_REFRESH_SECONDS):
+        self.url = url
+        self.file = file
+        self.secret_key = secret_key
+        self.refresh_seconds = refresh_seconds
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    def _fetch(self) -> dict:
+        if self.file:
+            with open(self.file) as f:
+                return json.load(f)
+        headers = {"Authorization": f"Bearer {self.secret_key}"} if self.secret_key else {}
+        response = httpx.get(self.url, headers=headers, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self) -> None:
+        with self._lock:
+            # Counted even if the fetch fails, so an unreachable Clerk is retried at most
+            # every JWKS_MIN_REFRESH_INTERVAL instead of on every request
+            self._fetched_at = time.monotonic()
+        jwks = self._fetch()
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("kid") and jwk.get("kty") == "RSA":
+                keys[jwk["kid"]] = jwt.PyJWK(jwk, algorithm="RS256")
+        with self._lock:
+            self._keys = keys
+        logger.info(f"Loaded {len(keys)} Clerk signing key(s)")
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the keys we have; they are still valid until rotated out
+                logger.warning(f"Background JWKS refresh failed: {e}")
+
+    def _start_refresher(self) -> None:
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+            self._refresher.start()
+
+    def get_key(self, kid: str) -> jwt.PyJWK:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._lock:
+            stale = not self._fetched_at or time.monotonic() - self._fetched_at >= JWKS_MIN_REFRESH_INTERVAL
+        if stale:
+            self.refresh()
+            self._start_refresher()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key id: {kid}")
+        return key
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified claims keyed by token hash, valid until the token's exp."""
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims["exp"] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class ClerkTokenVerifier:
+    """Verifies Clerk session tokens locally; invalid tokens raise jwt.PyJWTError."""
+
+    def __init__(self, jwks: JWKSCache, issuer: Optional[str] = None,
+                 authorized_parties: Optional[list] = None, cache_size: int = TOKEN_CACHE_SIZE):
+        self.jwks = jwks
+        self.issuer = issuer
+        self.authorized_parties = authorized_parties or []
+        self.cache = VerifiedTokenCache(cache_size)
+
+    def verify(self, token: str) -> dict:
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") != "RS256":
+            raise jwt.InvalidAlgorithmError(f"Unexpected token algorithm: {header.get('alg')}")
+        key = self.jwks.get_key(header.get("kid", ""))
+        claims = jwt.decode(
+            token,
+            key.key,
+            algorithms=["RS256"],
+            issuer=self.issuer,
+            leeway=CLOCK_SKEW_SECONDS,
+            options={"require": ["exp", "sub"], "verify_iss": bool(self.issuer)},
+        )
+        if self.authorized_parties and claims.get("azp") not in self.authorized_parties:
+            raise jwt.InvalidTokenError(f"Unauthorized party: {claims.get('azp')}")
+
+        self.cache.put(token, claims)
+        return claims
+
+
+_verifier: Optional[ClerkTokenVerifier] = None
+
+
+def get_verifier() -> ClerkTokenVerifier:
+    global _verifier
+    if _verifier is None:
+        jwks = JWKSCache(url=CLERK_JWKS_URL, file=CLERK_JWKS_FILE, secret_key=CLERK_SECRET_KEY)
+        _verifier = ClerkTokenVerifier(jwks, CLERK_ISSUER, CLERK_AUTHORIZED_PARTIES)
+    return _verifier
+
+
+def _authenticate(token: str) -> dict:
+    """Verify a bearer token and map its claims to our user dict. Raises 401 if invalid."""
+    try:
+        claims = get_verifier().verify(token)
+    except jwt.PyJWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid authentication token: {e}")
+    except Exception as e:
+        # e.g. JWKS could not be fetched; don't let unverified tokens through
+        logger.error(f"Token verification unavailable: {e}")
+        raise HTTPException(status_code=401, detail="Could not verify authentication token")
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        "username": claims.get("username"),
+    }
+
+
 def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Security(security)
 ) -> dict:
     """
     Dependency to get current authenticated user (optional).
-    Returns user info if token is present, otherwise returns anonymous user.
-    
-    Note: Full token verification requires Clerk's backend API or JWKS verification.
-    For production, implement proper JWT verification using Clerk's public keys.
+    Returns user info if a valid token is present, otherwise returns anonymous user.
+    A token that fails verification is rejected with 401 rather than ignored.
     """
-    if not CLERK_SECRET_KEY:
+    if not AUTH_CONFIGURED:
         # Authentication not configured - allow all requests
         return {"id": "anonymous", "email": None, "username": None}
-    
+
     if not credentials:
         # No token provided - allow request but mark as anonymous
         return {"id": "anonymous", "email": None, "username": None}
-    
-    # Token is present - in production, verify it properly
-    # For now, extract user info from token (basic implementation)
-    token = credentials.credentials
-    
-    # TODO: Implement proper JWT verification using Clerk's JWKS
-    # For now, if token exists, assume user is authenticated
-    # In production, verify the token signature using Clerk's public keys
-    return {
-        "id": "authenticated_user",
-        "email": None,
-        "username": None,
-        "token": token[:20] + "..." if len(token) > 20 else token  # For debugging
-    }
+
+    return _authenticate(credentials.credentials)
 
 
 def get_current_user_required(
@@ -56,19 +235,10 @@ def get_current_user_required(
     Dependency to require authentication.
     Raises 401 if not authenticated.
     """
-    if not CLERK_SECRET_KEY:
+    if not AUTH_CONFIGURED:
         raise HTTPException(status_code=401, detail="Authentication required but not configured")
-    
+
     if not credentials:
         raise HTTPException(status_code=401, detail="Authentication required. Please sign in.")
-    
-    token = credentials.credentials
-    
-    # TODO: Implement proper token verification
-    # For now, if token exists, allow request
-    return {
-        "id": "authenticated_user",
-        "email": None,
-        "username": None
-    }
 
+    return _authenticate(credentials.credentials)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, LargeBinary, ForeignKey
+from app.database import Base
+
+class SubmissionFingerprint(Base):
+    """MinHash signature of a reviewed submission, used to verify LSH candidates."""
+    __tablename__ = "submission_fingerprints"
+    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+
+class SubmissionLSHBucket(Base):
+    """One row per (LSH band key, submission); looked up by bucket to find near-duplicates."""
+    __tablename__ = "submission_lsh_buckets"
+    bucket = Column(BigInteger, primary_key=True)
+    submission_id = Column(Integer, ForeignKey("submissions.id", ondelete="CASCADE"), primary_key=True, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, String, DateTime, func
+from sqlalchemy import Column, Integer, Text, String, DateTime, ForeignKey, func
 from app.database import Base
 
 class Submission(Base):
@@ -9,3 +9,7 @@ class Submission(Base):
     review = Column(Text, nullable=True)
     status = Column(String(20), nullable=False, server_default="pending")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Earlier revision of the same code; its review is updated from the diff instead of starting over
+    parent_id = Column(Integer, ForeignKey("submissions.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Clerk user id of the submitter (None for anonymous); only they may cancel or supersede its review
+    user_id = Column(String(64), nullable=True, index=True)
@@ -6,6 +6,7 @@ class SubmissionCreate(BaseModel):
     language: str | None = None
     review: str | None = None
     status: str | None = None
+    parent_id: int | None = None
 
 class SubmissionOut(BaseModel):
     id: int
@@ -14,5 +15,6 @@ class SubmissionOut(BaseModel):
     review: str | None
     status: str
     created_at: datetime
+    parent_id: int | None = None
     class Config:
         from_attributes = True
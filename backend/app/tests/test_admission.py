@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+from redis import Redis
+from rq import Queue
+
+from app.api.main import app
+from app.jobs import admission
+from app.jobs.admission import AdmissionDecision, admit_submission, projected_wait_seconds
+
+client = TestClient(app)
+
+
+def test_projected_wait_scales_with_depth_and_workers():
+    assert projected_wait_seconds(0, 1, 10) == 10
+    assert projected_wait_seconds(9, 2, 10) == 50
+    # No live workers is treated as one rather than dividing by zero
+    assert projected_wait_seconds(4, 0, 10) == 50
+
+
+def test_admission_fails_open_without_redis():
+    q = Queue("reviews", connection=Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1))
+    assert admit_submission(q, "user_1").action == "accept"
+
+
+def test_token_bucket_allows_burst_then_throttles(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(admission, "USER_QUOTA_BURST", 3)
+    monkeypatch.setattr(admission, "USER_QUOTA_RATE", 0.5)
+    conn = fakeredis.FakeRedis()
+
+    results = [admission.consume_user_token(conn, "user_1") for _ in range(4)]
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    # One token refills every 2s at 0.5 tokens/s
+    assert 0 < results[-1][1] <= 2
+    # Buckets are per user
+    assert admission.consume_user_token(conn, "user_2")[0] is True
+
+
+def test_quota_exceeded_returns_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission, "check_queue_capacity", lambda q: AdmissionDecision("accept"))
+    monkeypatch.setattr(admission, "consume_user_token", lambda conn, key: (False, 2.3))
+
+    res = client.post("/api/submissions", json={"code": "x = 1", "language": "python"})
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "3"
+
+
+def test_overload_rejects_without_spending_quota(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        admission, "check_queue_capacity",
+        lambda q: AdmissionDecision("reject", retry_after=40, reason="busy"),
+    )
+    monkeypatch.setattr(admission, "consume_user_token", lambda conn, key: calls.append(key) or (True, 0.0))
+
+    res = client.post("/api/submissions", json={"code": "x = 1", "language": "python"})
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "40"
+    assert calls == []
@@ -1,11 +1,48 @@
 import json
+import pytest
 from fastapi.testclient import TestClient
 
+from app import export
 from app.api.main import app
+from app.database import SessionLocal
+from app.middleware.clerk_auth import get_current_user_optional, get_current_user_required
+from app.models.submission import Submission
 
 client = TestClient(app)
 
 
+@pytest.fixture
+def exporter(monkeypatch):
+    """Signed-in user on the export allowlist."""
+    monkeypatch.setattr(export, "EXPORT_ALLOWED_USERS", ["user_exporter"])
+    app.dependency_overrides[get_current_user_required] = lambda: {"id": "user_exporter", "email": None, "username": None}
+    yield
+    app.dependency_overrides.pop(get_current_user_required, None)
+
+
+@pytest.fixture
+def signed_in():
+    """Act as the given Clerk user for both optional and required auth."""
+    def sign_in(user_id):
+        user = {"id": user_id, "email": None, "username": None}
+        app.dependency_overrides[get_current_user_optional] = lambda: user
+        app.dependency_overrides[get_current_user_required] = lambda: user
+    yield sign_in
+    app.dependency_overrides.pop(get_current_user_optional, None)
+    app.dependency_overrides.pop(get_current_user_required, None)
+
+
+def insert_submission(**fields):
+    db = SessionLocal()
+    try:
+        s = Submission(code="x = 1", language="python", **fields)
+        db.add(s)
+        db.commit()
+        return s.id
+    finally:
+        db.close()
+
+
 def test_health():
     res = client.get("/health")
     assert res.status_code == 200
@@ -24,3 +61,72 @@ def test_create_and_list_submission():
     assert res_list.status_code == 200
     items = res_list.json()
     assert any(item["id"] == data["id"] for item in items)
+
+
+def test_export_requires_allowed_user(monkeypatch):
+    assert client.get("/api/submissions/export").status_code == 401
+
+    monkeypatch.setattr(export, "EXPORT_ALLOWED_USERS", [])
+    app.dependency_overrides[get_current_user_required] = lambda: {"id": "user_other", "email": None, "username": None}
+    try:
+        assert client.get("/api/submissions/export").status_code == 403
+    finally:
+        app.dependency_overrides.pop(get_current_user_required, None)
+
+
+def test_export_ndjson_resumes_from_cursor(exporter):
+    ids = [client.post("/api/submissions", json={"code": f"x = {i}", "language": "python"}).json()["id"] for i in range(3)]
+
+    res = client.get("/api/submissions/export", params={"language": "python"})
+    assert res.status_code == 200
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert set(ids) <= {row["id"] for row in rows}
+
+    first = next(row for row in rows if row["id"] == ids[0])
+    res_resumed = client.get("/api/submissions/export", params={"cursor": first["cursor"]})
+    resumed_ids = [json.loads(line)["id"] for line in res_resumed.text.splitlines()]
+    assert ids[0] not in resumed_ids
+    assert ids[1] in resumed_ids and ids[2] in resumed_ids
+
+
+def test_export_rejects_bad_cursor(exporter):
+    res = client.get("/api/submissions/export", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+
+def test_create_revision_requires_existing_parent():
+    parent = client.post("/api/submissions", json={"code": "x = 1\ny = 2\n", "language": "python"}).json()
+    res = client.post("/api/submissions", json={"code": "x = 1\ny = 3\n", "language": "python", "parent_id": parent["id"]})
+    assert res.status_code == 200
+    assert res.json()["parent_id"] == parent["id"]
+
+    res_missing = client.post("/api/submissions", json={"code": "x = 1", "parent_id": 10**9})
+    assert res_missing.status_code == 404
+
+
+def test_cancel_submission(signed_in):
+    submission_id = insert_submission(status="pending", user_id="user_owner")
+    assert client.post(f"/api/submissions/{submission_id}/cancel").status_code == 401
+
+    signed_in("user_other")
+    assert client.post(f"/api/submissions/{submission_id}/cancel").status_code == 403
+
+    signed_in("user_owner")
+    res = client.post(f"/api/submissions/{submission_id}/cancel")
+    assert res.status_code == 200
+    assert res.json()["status"] == "cancelled"
+    assert client.post(f"/api/submissions/{submission_id}/cancel").status_code == 409
+    assert client.post("/api/submissions/999999999/cancel").status_code == 404
+
+
+def test_revision_supersedes_only_own_parent(signed_in):
+    other_parent = insert_submission(status="pending", user_id="user_owner")
+    own_parent = insert_submission(status="pending", user_id="user_reviser")
+
+    signed_in("user_reviser")
+    for parent_id in (other_parent, own_parent):
+        res = client.post("/api/submissions", json={"code": "x = 2", "language": "python", "parent_id": parent_id})
+        assert res.status_code == 200
+
+    assert client.get(f"/api/submissions/{other_parent}").json()["status"] == "pending"
+    assert client.get(f"/api/submissions/{own_parent}").json()["status"] == "cancelled"
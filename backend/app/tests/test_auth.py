@@ -0,0 +1,95 @@
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.middleware import clerk_auth
+from app.middleware.clerk_auth import ClerkTokenVerifier, JWKSCache
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "use": "sig", "alg": "RS256"})
+    return private_key, jwk
+
+
+def sign(private_key, kid, **claims):
+    payload = {"sub": "user_123", "exp": int(time.time()) + 60, **claims}
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def keys(tmp_path):
+    private_key, jwk = make_key("k1")
+    jwks_file = tmp_path / "jwks.json"
+    jwks_file.write_text(json.dumps({"keys": [jwk]}))
+    return private_key, jwks_file
+
+
+def test_verifies_and_caches_valid_token(keys):
+    private_key, jwks_file = keys
+    verifier = ClerkTokenVerifier(JWKSCache(file=str(jwks_file)))
+    token = sign(private_key, "k1")
+
+    assert verifier.verify(token)["sub"] == "user_123"
+    assert verifier.cache.get(token)["sub"] == "user_123"
+
+
+def test_rejects_bad_signature_and_expired_tokens(keys):
+    private_key, jwks_file = keys
+    verifier = ClerkTokenVerifier(JWKSCache(file=str(jwks_file)))
+    other_key, _ = make_key("k1")
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(sign(other_key, "k1"))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.verify(sign(private_key, "k1", exp=int(time.time()) - 60))
+
+
+def test_unknown_kid_refreshes_jwks_for_rotation(keys):
+    private_key, jwks_file = keys
+    jwks = JWKSCache(file=str(jwks_file))
+    verifier = ClerkTokenVerifier(jwks)
+    verifier.verify(sign(private_key, "k1"))
+
+    rotated_key, rotated_jwk = make_key("k2")
+    jwks_file.write_text(json.dumps({"keys": [rotated_jwk]}))
+    jwks._fetched_at = 0  # pretend the last fetch was long ago
+    assert verifier.verify(sign(rotated_key, "k2"))["sub"] == "user_123"
+
+
+def test_invalid_token_is_rejected_with_401(keys, monkeypatch):
+    _, jwks_file = keys
+    monkeypatch.setattr(clerk_auth, "AUTH_CONFIGURED", True)
+    monkeypatch.setattr(clerk_auth, "_verifier", ClerkTokenVerifier(JWKSCache(file=str(jwks_file))))
+
+    with pytest.raises(HTTPException) as exc:
+        clerk_auth.get_current_user_optional(HTTPAuthorizationCredentials(scheme="Bearer", credentials="not.a.jwt"))
+    assert exc.value.status_code == 401
+    assert clerk_auth.get_current_user_optional(None)["id"] == "anonymous"
+
+
+def test_failed_jwks_fetch_is_not_retried_per_request(keys, monkeypatch):
+    private_key, jwks_file = keys
+    jwks = JWKSCache(file=str(jwks_file))
+    fetches = []
+
+    def unreachable():
+        fetches.append(time.monotonic())
+        raise OSError("Clerk unreachable")
+
+    monkeypatch.setattr(jwks, "_fetch", unreachable)
+    with pytest.raises(OSError):
+        jwks.get_key("k1")
+    with pytest.raises(jwt.InvalidKeyError):
+        jwks.get_key("k1")
+    assert len(fetches) == 1
+
+    jwks._fetched_at -= clerk_auth.JWKS_MIN_REFRESH_INTERVAL  # interval elapsed
+    monkeypatch.undo()
+    assert jwks.get_key("k1").key_id == "k1"
@@ -0,0 +1,106 @@
+import pytest
+
+from app.analyzers.ai import DeadlineExceeded, parse_batch_review
+from app.jobs import batch_review
+from app.models.submission import Submission
+
+
+class FakeSession:
+    """Just enough of a Session for review_batch; rows stay as the test built them."""
+
+    def __init__(self):
+        self.pending = []
+        self.committed = {}
+
+    def add(self, s):
+        self.pending.append(s)
+
+    def refresh(self, s):
+        pass
+
+    def commit(self):
+        self.committed.update({s.id: (s.status, s.review) for s in self.pending})
+        self.pending = []
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    calls = []
+
+    def single_review(code, language):
+        calls.append(code)
+        return f"single: {code}"
+
+    monkeypatch.setattr(batch_review, "generate_ai_review", single_review)
+    monkeypatch.setattr(batch_review.review_reuse, "reuse_or_signature", lambda db, s: (None, None))
+    monkeypatch.setattr(batch_review.review_reuse, "index_submission", lambda db, s, sig: None)
+    rows = [Submission(id=i, code=f"x = {i}", language="python", status="processing") for i in (1, 2, 3)]
+    return rows, calls
+
+
+def test_parse_batch_review_splits_by_id():
+    text = '```json\n{"1": "Looks fine.", "2": "Avoid eval.", "9": "stray"}\n```'
+    assert parse_batch_review(text, [1, 2]) == {1: "Looks fine.", 2: "Avoid eval."}
+
+
+def test_parse_batch_review_omits_missing_items():
+    assert parse_batch_review('{"1": "ok", "2": ""}', [1, 2, 3]) == {1: "ok"}
+
+
+def test_parse_batch_review_rejects_non_json():
+    with pytest.raises(ValueError):
+        parse_batch_review("Snippet 1 looks fine.", [1])
+
+
+def test_review_batch_falls_back_when_batch_call_fails(monkeypatch, batch):
+    rows, calls = batch
+
+    def broken_batch(items):
+        raise ValueError("Batched review response was not a JSON object")
+
+    monkeypatch.setattr(batch_review, "generate_ai_review_batch", broken_batch)
+    batch_review.review_batch(FakeSession(), rows)
+
+    assert calls == ["x = 1", "x = 2", "x = 3"]
+    assert all(s.status == "reviewed" and s.review == f"single: {s.code}" for s in rows)
+
+
+def test_review_batch_reviews_items_missing_from_response(monkeypatch, batch):
+    rows, calls = batch
+    monkeypatch.setattr(batch_review, "generate_ai_review_batch", lambda items: {1: "batched 1", 3: "batched 3"})
+    batch_review.review_batch(FakeSession(), rows)
+
+    assert calls == ["x = 2"]
+    assert [s.review for s in rows] == ["batched 1", "single: x = 2", "batched 3"]
+    assert all(s.status == "reviewed" for s in rows)
+
+
+def test_review_batch_skips_items_cancelled_in_flight(monkeypatch, batch):
+    rows, calls = batch
+
+    def broken_batch(items):
+        rows[1].status = "cancelled"
+        raise ValueError("Batched review response was not a JSON object")
+
+    monkeypatch.setattr(batch_review, "generate_ai_review_batch", broken_batch)
+    batch_review.review_batch(FakeSession(), rows)
+
+    assert calls == ["x = 1", "x = 3"]
+    assert rows[1].status == "cancelled" and rows[1].review is None
+
+
+def test_review_batch_commits_each_item_before_a_later_failure(monkeypatch, batch):
+    rows, calls = batch
+
+    def single_review(code, language):
+        if code == "x = 2":
+            raise DeadlineExceeded("Review deadline passed during the provider call")
+        return f"single: {code}"
+
+    monkeypatch.setattr(batch_review, "generate_ai_review", single_review)
+    monkeypatch.setattr(batch_review, "generate_ai_review_batch", lambda items: {})
+    db = FakeSession()
+    with pytest.raises(DeadlineExceeded):
+        batch_review.review_batch(db, rows)
+
+    assert db.committed == {1: ("reviewed", "single: x = 1")}
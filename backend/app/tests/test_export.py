@@ -0,0 +1,46 @@
+import csv
+import gzip
+import hashlib
+import io
+
+import pytest
+
+from app import export
+
+
+def _record(i):
+    return {"id": i, "code": f"x = {i}\nprint(x, 'a,b')", "language": "python", "review": None,
+            "status": "pending", "created_at": "2024-01-01T00:00:00", "parent_id": None,
+            "cursor": export.encode_cursor(i)}
+
+
+def test_cursor_round_trip():
+    token = export.encode_cursor(1234)
+    assert "=" not in token
+    assert export.decode_cursor(token) == 1234
+
+
+@pytest.mark.parametrize("token", ["not-a-cursor", "", export.encode_cursor(1)[:-2] + "!!"])
+def test_decode_cursor_rejects_malformed(token):
+    with pytest.raises(ValueError):
+        export.decode_cursor(token)
+
+
+def test_iter_csv_writes_header_and_quotes_fields():
+    text = "".join(export.iter_csv(_record(i) for i in range(3)))
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [int(r["id"]) for r in rows] == [0, 1, 2]
+    assert rows[1]["code"] == "x = 1\nprint(x, 'a,b')"
+    assert export.decode_cursor(rows[2]["cursor"]) == 2
+
+
+def test_iter_chunks_gzip_round_trip(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_SIZE", 256)
+    parts = [hashlib.sha256(str(i).encode()).hexdigest() + "\n" for i in range(2000)]
+    chunks = list(export.iter_chunks(parts, compress=True))
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)).decode() == "".join(parts)
+
+
+def test_iter_chunks_plain():
+    assert b"".join(export.iter_chunks(["a", "b", "c"])) == b"abc"
@@ -0,0 +1,104 @@
+import random
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.analyzers.python_ast import analyze_python, parse_cached
+
+
+def rules(code):
+    return [issue["rule"] for issue in analyze_python(code)]
+
+
+def test_strings_and_comments_are_not_flagged():
+    code = 'msg = "print( eval( \\t"\n# os.system( in a comment\nlen(msg)\n'
+    assert rules(code) == []
+
+
+def test_visitor_rules():
+    code = (
+        "import os\n"
+        "def f(x, acc=[]):\n"
+        "    try:\n"
+        "        return eval(x)\n"
+        "    except:\n"
+        "        print(acc)\n"
+    )
+    assert rules(code) == ["py.unused_import", "py.mutable_default", "py.risky", "py.bare_except", "py.print"]
+
+
+def test_syntax_error_is_reported():
+    [issue] = analyze_python("def f(:\n")
+    assert issue["rule"] == "py.syntax"
+    assert issue["line"] == 1
+
+
+def test_parse_cache_reuses_tree():
+    code = "x = 1\n"
+    assert parse_cached(code) is parse_cached(code)
+
+
+def test_live_review_offloads_large_python_input():
+    code = "\n".join(f"v{i} = {i}" for i in range(1000)) + "\nprint(v1)\n"
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/review") as ws:
+            ws.send_json({"code": code, "language": "python"})
+            issues = ws.receive_json()["issues"]
+    assert [i["rule"] for i in issues] == ["py.print"]
+
+
+def test_large_input_is_analyzed_in_pool(monkeypatch):
+    from app.analyzers import basic, python_ast
+
+    submitted = []
+    real_pool = python_ast.get_analyzer_pool
+
+    def tracking_pool():
+        pool = real_pool()
+        submit = pool.submit
+        monkeypatch.setattr(pool, "submit", lambda fn, *args: submitted.append(fn) or submit(fn, *args))
+        return pool
+
+    monkeypatch.setattr(python_ast, "get_analyzer_pool", tracking_pool)
+    code = "import os\n" + "x = 1\n" * (python_ast.INLINE_MAX_CHARS // 6 + 1)
+    try:
+        review = basic.generate_basic_review(code, "python", offload=True)
+    finally:
+        python_ast.shutdown_analyzer_pool()
+    assert submitted == [python_ast.analyze_python]
+    assert "'os' is imported but unused" in review
+
+
+def test_large_input_is_analyzed_inline_by_default(monkeypatch):
+    from app.analyzers import basic, python_ast
+
+    monkeypatch.setattr(python_ast, "get_analyzer_pool", lambda: pytest.fail("pool used outside the API process"))
+    code = "import os\n" + "x = 1\n" * (python_ast.INLINE_MAX_CHARS // 6 + 1)
+    assert "'os' is imported but unused" in basic.generate_basic_review(code, "python")
+
+
+def test_parse_cache_is_thread_safe(monkeypatch):
+    from app.analyzers import python_ast
+
+    # Hits racing evictions: get() then move_to_end() on a key another thread just evicted
+    monkeypatch.setattr(python_ast, "PARSE_CACHE_SIZE", 2)
+    monkeypatch.setattr(python_ast, "_parse_cache", OrderedDict())
+    codes = [f"x = {i}\n" for i in range(3)]
+
+    def hammer(seed):
+        rng = random.Random(seed)
+        for _ in range(5000):
+            parse_cached(rng.choice(codes))
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for future in [pool.submit(hammer, seed) for seed in range(8)]:
+                future.result()
+    finally:
+        sys.setswitchinterval(interval)
@@ -0,0 +1,140 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.analyzers import ai
+from app.database import Base
+from app.jobs import review_job
+from app.models import fingerprint  # noqa: F401  (registers the similarity tables)
+from app.models.submission import Submission
+
+@pytest.fixture
+def database(monkeypatch):
+    """In-memory SQLite in place of the configured database, so these tests need no server."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(review_job, "SessionLocal", session_factory)
+    yield session_factory
+    engine.dispose()
+
+
+def insert_pending(database, status="pending"):
+    db = database()
+    try:
+        s = Submission(code="print('deadline')", language="python", status=status)
+        db.add(s)
+        db.commit()
+        return s.id
+    finally:
+        db.close()
+
+
+def status_of(database, submission_id):
+    db = database()
+    try:
+        return db.get(Submission, submission_id).status
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Record provider calls instead of reaching out to a real one."""
+    calls = []
+    monkeypatch.setattr(review_job.review_reuse, "REVIEW_REUSE", False)
+    monkeypatch.setattr(review_job, "_record_duration", lambda seconds: None)
+    monkeypatch.setattr(review_job, "generate_ai_review", lambda code, language: calls.append(code) or "Looks fine.")
+    return calls
+
+
+def test_request_timeout_raises_once_deadline_passed():
+    with ai.review_deadline(time.time() - 1):
+        with pytest.raises(ai.DeadlineExceeded):
+            ai._request_timeout()
+    with ai.review_deadline(time.time() + 1000):
+        assert ai._request_timeout() == ai.PROVIDER_TIMEOUT
+
+
+def test_provider_timeout_after_deadline_becomes_deadline_exceeded(monkeypatch):
+    def slow_gemini(prompt, max_tokens):
+        time.sleep(0.05)
+        raise TimeoutError("read timed out")
+
+    monkeypatch.setenv("AI_REVIEW_PROVIDER", "gemini")
+    monkeypatch.setattr(ai, "complete_gemini", slow_gemini)
+    with ai.review_deadline(time.time() + 0.01):
+        with pytest.raises(ai.DeadlineExceeded):
+            ai.complete("prompt")
+
+
+def test_expired_job_is_cancelled_without_provider_call(database, provider):
+    submission_id = insert_pending(database)
+    review_job.run_review(submission_id, deadline=time.time() - 1)
+    assert status_of(database, submission_id) == "cancelled"
+    assert provider == []
+
+
+def test_deadline_during_review_cancels_submission(database, monkeypatch, provider):
+    def hanging_review(code, language):
+        raise ai.DeadlineExceeded("Review deadline passed during the provider call")
+
+    monkeypatch.setattr(review_job, "generate_ai_review", hanging_review)
+    submission_id = insert_pending(database)
+    review_job.run_review(submission_id, deadline=time.time() + 60)
+    assert status_of(database, submission_id) == "cancelled"
+
+
+def test_review_within_deadline_completes(database, provider):
+    submission_id = insert_pending(database)
+    review_job.run_review(submission_id, deadline=time.time() + 60)
+    assert status_of(database, submission_id) == "reviewed"
+    assert provider == ["print('deadline')"]
+
+
+def test_row_claimed_by_another_worker_is_skipped(database, provider):
+    submission_id = insert_pending(database, status="processing")
+    review_job.run_review(submission_id, deadline=time.time() + 60)
+    assert status_of(database, submission_id) == "processing"
+    assert provider == []
+
+    failed_id = insert_pending(database, status="error")
+    review_job.run_review(failed_id, deadline=time.time() + 60)
+    assert status_of(database, failed_id) == "reviewed"
+
+
+def test_job_timeout_outlasts_review_deadline():
+    fakeredis = pytest.importorskip("fakeredis")
+    from rq import Queue
+
+    job = review_job.enqueue_review(Queue("reviews", connection=fakeredis.FakeStrictRedis()), 42)
+    assert job.id == review_job.review_job_id(42)
+    assert job.timeout > review_job.REVIEW_DEADLINE_SECONDS
+
+
+@pytest.mark.parametrize("batch_size, stopped", [(1, True), (3, False)])
+def test_cancel_stops_running_job_unless_it_holds_a_batch(database, monkeypatch, batch_size, stopped):
+    fakeredis = pytest.importorskip("fakeredis")
+    from rq.job import Job, JobStatus
+
+    submission_id = insert_pending(database)
+    conn = fakeredis.FakeStrictRedis()
+    job = Job.create(review_job.run_review, args=(submission_id,), id=review_job.review_job_id(submission_id), connection=conn)
+    job.meta["batch_ids"] = [submission_id + i for i in range(batch_size)]
+    job.set_status(JobStatus.STARTED)
+    job.save()
+
+    stop_calls = []
+    monkeypatch.setattr(review_job, "get_redis", lambda: conn)
+    monkeypatch.setattr(review_job, "send_stop_job_command", lambda c, job_id: stop_calls.append(job_id))
+
+    db = database()
+    try:
+        assert review_job.cancel_review(db, db.get(Submission, submission_id))
+    finally:
+        db.close()
+    assert status_of(database, submission_id) == "cancelled"
+    assert stop_calls == ([job.id] if stopped else [])
@@ -0,0 +1,95 @@
+import pytest
+
+from app.analyzers import ai
+from app.jobs import revision_review
+from app.models.submission import Submission
+
+PARENT_CODE = "\n".join(f"line_{i} = {i}" for i in range(10)) + "\n"
+
+
+class FakeSession:
+    """Looks submissions up by id, which is all review_revision needs."""
+
+    def __init__(self, *rows):
+        self.rows = {s.id: s for s in rows}
+
+    def get(self, model, submission_id):
+        return self.rows.get(submission_id)
+
+
+def edit_lines(code, numbers):
+    return "".join(
+        f"line_{i} = {i * 100}\n" if i in numbers else ln + "\n"
+        for i, ln in enumerate(code.splitlines())
+    )
+
+
+@pytest.fixture
+def parent():
+    return Submission(id=1, code=PARENT_CODE, language="python", status="reviewed", review="Parent review.")
+
+
+@pytest.fixture
+def revision_calls(monkeypatch):
+    calls = []
+
+    def fake_revision_review(diff, previous_review, code, language):
+        calls.append(diff)
+        return "Updated review."
+
+    monkeypatch.setattr(revision_review, "generate_ai_revision_review", fake_revision_review)
+    return calls
+
+
+def test_compute_diff_counts_edited_lines_once():
+    diff, changed = revision_review.compute_diff(PARENT_CODE, edit_lines(PARENT_CODE, {2, 5, 8}))
+    assert changed == 3
+    assert "-line_5 = 5" in diff and "+line_5 = 500" in diff
+
+    _, changed = revision_review.compute_diff("a\nb\nc\n", "a\nc\nd\ne\n")
+    assert changed == 3  # b removed, d and e added
+
+
+def test_unchanged_revision_reuses_parent_review(parent, revision_calls):
+    child = Submission(id=2, code=PARENT_CODE, language="python", parent_id=1)
+    assert revision_review.review_revision(FakeSession(parent), child) == "Parent review."
+    assert revision_calls == []
+
+
+def test_small_edit_is_reviewed_from_the_diff(parent, revision_calls):
+    child = Submission(id=2, code=edit_lines(PARENT_CODE, {2, 5, 8}), language="python", parent_id=1)
+    assert revision_review.review_revision(FakeSession(parent), child) == "Updated review."
+    assert len(revision_calls) == 1 and "+line_8 = 800" in revision_calls[0]
+
+
+@pytest.mark.parametrize("child_fields, parent_fields", [
+    ({"code": edit_lines(PARENT_CODE, set(range(1, 7)))}, {}),  # over REVISION_MAX_CHANGED_RATIO
+    ({"language": "javascript"}, {}),
+    ({}, {"status": "processing", "review": None}),
+    ({"parent_id": None}, {}),
+])
+def test_falls_back_to_full_review(parent, revision_calls, child_fields, parent_fields):
+    for field, value in parent_fields.items():
+        setattr(parent, field, value)
+    fields = {"id": 2, "code": edit_lines(PARENT_CODE, {3}), "language": "python", "parent_id": 1, **child_fields}
+    assert revision_review.review_revision(FakeSession(parent), Submission(**fields)) is None
+    assert revision_calls == []
+
+
+def test_revision_provider_failure_falls_back_to_full_review(monkeypatch):
+    def broken_complete(prompt, max_tokens=2000):
+        raise RuntimeError("provider unavailable")
+
+    monkeypatch.setattr(ai, "complete", broken_complete)
+    monkeypatch.setattr(ai, "generate_ai_review", lambda code, language: f"full: {code}")
+    assert ai.generate_ai_revision_review("@@ diff @@", "Parent review.", "x = 2", "python") == "full: x = 2"
+
+
+def test_revision_deadline_is_not_swallowed(monkeypatch):
+    def expired_complete(prompt, max_tokens=2000):
+        raise ai.DeadlineExceeded("Review deadline passed before the provider call")
+
+    monkeypatch.setattr(ai, "complete", expired_complete)
+    monkeypatch.setattr(ai, "generate_ai_review", lambda code, language: pytest.fail("full review after deadline"))
+    with pytest.raises(ai.DeadlineExceeded):
+        ai.generate_ai_revision_review("@@ diff @@", "Parent review.", "x = 2", "python")
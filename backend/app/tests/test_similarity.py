@@ -0,0 +1,54 @@
+from app.analyzers.similarity import estimate_similarity, lsh_buckets, minhash_signature, normalize_tokens
+
+ORIGINAL = """def average(values):
+    total = 0
+    for v in values:
+        total += v
+    return total / len(values)
+"""
+
+# Same code with renamed identifiers, a comment and different whitespace
+RENAMED = """def mean(xs):  # arithmetic mean
+    acc = 0
+    for x in xs:
+        acc  +=  x
+    return acc / len(xs)
+"""
+
+DIFFERENT = """class Cache:
+    def __init__(self):
+        self.items = {}
+
+    def get(self, key):
+        return self.items.get(key)
+"""
+
+
+def test_renamed_code_is_near_duplicate():
+    a, b = minhash_signature(ORIGINAL, "python"), minhash_signature(RENAMED, "python")
+    assert estimate_similarity(a, b) == 1.0
+    assert set(lsh_buckets(a)) & set(lsh_buckets(b))
+
+
+def test_unrelated_code_is_not_near_duplicate():
+    assert estimate_similarity(minhash_signature(ORIGINAL, "python"), minhash_signature(DIFFERENT, "python")) < 0.5
+
+
+def test_empty_code_has_no_signature():
+    assert minhash_signature("   # just a comment\n", "python") is None
+    assert minhash_signature("/* block */ // line\n", "javascript") is None
+
+
+def test_called_and_attribute_names_are_kept():
+    def similarity(a, b):
+        return estimate_similarity(minhash_signature(a, "python"), minhash_signature(b, "python"))
+
+    assert similarity("result = eval(data)", "result = json_loads(data)") < 0.5
+    assert similarity("os.system(cmd)", "os.getenv(cmd)") < 0.5
+    assert normalize_tokens("run(cmd, shell=True)", "python") == ["run", "(", "cmd", ",", "shell", "=", "True", ")"]
+
+
+def test_comment_syntax_is_per_language():
+    assert normalize_tokens("x = a // b + c", "python") == ["_id", "=", "a", "//", "b", "+", "c"]
+    assert normalize_tokens("color = '#fff'  # white", "python") == ["_id", "=", "'#fff'"]
+    assert normalize_tokens('url = "http://example.com"; // home', "javascript") == ["_id", "=", '"http://example.com"', ";"]
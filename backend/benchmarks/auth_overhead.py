@@ -0,0 +1,68 @@
+"""
+Micro-benchmark of per-request auth overhead.
+Uses a freshly generated RSA key and a local JWKS file as a stand-in for
+Clerk, so it runs offline.
+
+Usage (from backend/):
+    python -m benchmarks.auth_overhead [iterations]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.security import HTTPAuthorizationCredentials
+
+
+def make_jwks_file() -> tuple:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": "bench", "use": "sig", "alg": "RS256"})
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"keys": [jwk]}, f)
+    token = jwt.encode(
+        {"sub": "user_bench", "exp": int(time.time()) + 3600},
+        private_key, algorithm="RS256", headers={"kid": "bench"},
+    )
+    return path, token
+
+
+def per_call_us(fn, iterations: int) -> float:
+    fn()  # warm up (loads JWKS on first use)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    jwks_path, token = make_jwks_file()
+    os.environ["CLERK_JWKS_FILE"] = jwks_path
+    try:
+        from app.middleware import clerk_auth
+        from app.middleware.clerk_auth import ClerkTokenVerifier, JWKSCache
+
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        jwks = JWKSCache(file=jwks_path)
+        uncached = ClerkTokenVerifier(jwks, cache_size=0)
+
+        results = {
+            "anonymous (no token)": per_call_us(lambda: clerk_auth.get_current_user_optional(None), iterations),
+            "signature check every request": per_call_us(lambda: uncached.verify(token), iterations),
+            "verified-token LRU hit": per_call_us(lambda: clerk_auth.get_current_user_optional(credentials), iterations),
+        }
+    finally:
+        os.unlink(jwks_path)
+
+    print(f"Auth overhead per request ({iterations} iterations):")
+    for name, us in results.items():
+        print(f"  {name:<32} {us:9.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from alembic import context
 from app.database import Base, DATABASE_URL
 # Ensure models are imported so that Base.metadata is populated for autogenerate
 from app.models import submission as _submission  # noqa: F401
+from app.models import fingerprint as _fingerprint  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,40 @@
+"""add submission similarity index
+
+Revision ID: 5c1e8a2d4f37
+Revises: 0729868ee967
+Create Date: 2026-10-19 10:12:31.482907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8a2d4f37'
+down_revision: Union[str, Sequence[str], None] = '0729868ee967'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'submission_fingerprints',
+        sa.Column('submission_id', sa.Integer(), sa.ForeignKey('submissions.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+    )
+    op.create_table(
+        'submission_lsh_buckets',
+        sa.Column('bucket', sa.BigInteger(), primary_key=True),
+        sa.Column('submission_id', sa.Integer(), sa.ForeignKey('submissions.id', ondelete='CASCADE'), primary_key=True),
+    )
+    op.create_index(op.f('ix_submission_lsh_buckets_submission_id'), 'submission_lsh_buckets', ['submission_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_submission_lsh_buckets_submission_id'), table_name='submission_lsh_buckets')
+    op.drop_table('submission_lsh_buckets')
+    op.drop_table('submission_fingerprints')
@@ -0,0 +1,32 @@
+"""add parent_id to submissions
+
+Revision ID: a3f9d61b7e20
+Revises: 5c1e8a2d4f37
+Create Date: 2026-10-19 11:04:52.117364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9d61b7e20'
+down_revision: Union[str, Sequence[str], None] = '5c1e8a2d4f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('submissions', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_submissions_parent_id'), 'submissions', ['parent_id'], unique=False)
+    op.create_foreign_key('fk_submissions_parent_id', 'submissions', 'submissions', ['parent_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('fk_submissions_parent_id', 'submissions', type_='foreignkey')
+    op.drop_index(op.f('ix_submissions_parent_id'), table_name='submissions')
+    op.drop_column('submissions', 'parent_id')
@@ -0,0 +1,30 @@
+"""add user_id to submissions
+
+Revision ID: b8d41f6c2e93
+Revises: a3f9d61b7e20
+Create Date: 2026-10-19 16:21:08.402715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d41f6c2e93'
+down_revision: Union[str, Sequence[str], None] = 'a3f9d61b7e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('submissions', sa.Column('user_id', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_submissions_user_id'), 'submissions', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_submissions_user_id'), table_name='submissions')
+    op.drop_column('submissions', 'user_id')